@@ -0,0 +1,97 @@
+import numpy as np
+
+# Candidate generation for SceneGraph.connect_rooms
+# Rooms are clustered into floors by the bottom of their y-extent, pairs on the same floor are ranked by the gap between their
+# bounding boxes and only the nearest are pathfound. Rooms that are not level with their floor (stairs, landings) or that reach up into
+# the floor above are kept as candidates of every room on the floors they touch, and each room keeps its nearest rooms on the
+# neighbouring floors in case the stairs are not a room of their own
+
+
+# Groups rooms into floors: sorted by the bottom of their y-extent, a new floor starts wherever the next room is more than floor_gap higher
+# Returns the floor index of each room (0 is the lowest floor)
+def cluster_floors(y_min, floor_gap:float=1.0) -> np.ndarray:
+    y_min = np.asarray(y_min, dtype=np.float64)
+    order = np.argsort(y_min, kind='stable')
+    new_floor = np.r_[False, np.diff(y_min[order]) > floor_gap]
+    floors = np.empty(len(y_min), dtype=np.int64)
+    floors[order] = np.cumsum(new_floor)
+    return floors
+
+# Pairwise gap between axis aligned boxes over the given axes, 0 where the boxes overlap
+def box_gaps(mins, maxs, axes=(0, 2)) -> np.ndarray:
+    mins = np.asarray(mins, dtype=np.float64)[:, list(axes)]
+    maxs = np.asarray(maxs, dtype=np.float64)[:, list(axes)]
+    separation = np.maximum(mins[:, None, :] - maxs[None, :, :], mins[None, :, :] - maxs[:, None, :])
+    return np.linalg.norm(np.maximum(separation, 0.0), axis=2)
+
+# Marks the k smallest entries of each row (ignoring infinite entries), the result is made symmetric
+def k_nearest_mask(distances, k:int) -> np.ndarray:
+    mask = np.zeros(distances.shape, dtype=bool)
+    if k <= 0 or distances.shape[1] == 0:
+        return mask
+    k = min(k, distances.shape[1])
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    rows = np.repeat(np.arange(len(distances)), k)
+    mask[rows, nearest.ravel()] = True
+    mask &= np.isfinite(distances)
+    return mask | mask.T
+
+
+# Configuration of the room pair pruning, with k_nearest and max_gap both None every pair on a floor is kept
+# k_nearest: number of nearest rooms (by bounding box gap in the xz plane) kept for each room on its floor
+# max_gap: pairs on a floor whose boxes are at most this far apart in the xz plane are always kept
+# floor_gap: height jump between the bottoms of successive rooms that starts a new floor
+# floor_tolerance: rooms whose bottom is this far above their floor's level, or whose top reaches this far above the next floor's level,
+#                  are treated as stairs and paired with every room on the floors they touch
+# inter_floor_k: number of nearest rooms (by 3D bounding box gap) kept for each room on the floors directly above and below it
+# inter_floor_gap: pairs on neighbouring floors whose boxes are at most this far apart in 3D are always kept (rooms stacked above
+#                  one another, a stairwell leaves a gap of only the floor's thickness)
+class CandidatePruning:
+    def __init__(self, k_nearest:int=None, max_gap:float=None, floor_gap:float=1.0, floor_tolerance:float=0.4, inter_floor_k:int=2, inter_floor_gap:float=0.5):
+        self.k_nearest = k_nearest
+        self.max_gap = max_gap
+        self.floor_gap = floor_gap
+        self.floor_tolerance = floor_tolerance
+        self.inter_floor_k = inter_floor_k
+        self.inter_floor_gap = inter_floor_gap
+
+    # Returns a symmetric (R, R) boolean mask of the room pairs to pathfind between, given the room centroids and dimensions
+    def candidates(self, centroids, dims) -> np.ndarray:
+        centroids = np.asarray(centroids, dtype=np.float64).reshape(-1, 3)
+        dims = np.asarray(dims, dtype=np.float64).reshape(-1, 3)
+        mins, maxs = centroids - dims / 2, centroids + dims / 2
+        num_rooms = len(centroids)
+
+        floors = cluster_floors(mins[:, 1], self.floor_gap)
+        num_floors = floors.max() + 1 if num_rooms > 0 else 0
+        floor_levels = np.array([np.median(mins[floors == f, 1]) for f in range(num_floors)])
+
+        # Floors touched by each room, stairs and landings touch every floor their y-extent reaches
+        touches = floors[:, None] == np.arange(num_floors)[None, :]
+        stairs = mins[:, 1] > floor_levels[floors] + self.floor_tolerance
+        stairs |= np.array([floor + 1 < num_floors and maxs[r, 1] > floor_levels[floor + 1] + self.floor_tolerance for r, floor in enumerate(floors)], dtype=bool)
+        touches[stairs] |= ((floor_levels[None, :] <= maxs[stairs, 1:2] + self.floor_tolerance) &
+                            (floor_levels[None, :] >= mins[stairs, 1:2] - self.floor_gap - self.floor_tolerance))
+        share_floor = (touches.astype(np.int64) @ touches.T.astype(np.int64)) > 0
+
+        same_floor = floors[:, None] == floors[None, :]
+        if self.k_nearest is None and self.max_gap is None:
+            kept = same_floor.copy()
+        else:
+            gaps = box_gaps(mins, maxs, (0, 2))
+            kept = np.zeros((num_rooms, num_rooms), dtype=bool)
+            if self.max_gap is not None:
+                kept |= same_floor & (gaps <= self.max_gap)
+            if self.k_nearest is not None:
+                floor_gaps = np.where(same_floor, gaps, np.inf)
+                np.fill_diagonal(floor_gaps, np.inf)
+                kept |= k_nearest_mask(floor_gaps, self.k_nearest)
+
+        # Stair fallbacks: stairs against every room on the floors they touch, and each room's nearest rooms on the neighbouring floors
+        kept |= share_floor & (stairs[:, None] | stairs[None, :])
+        neighbouring_floors = np.abs(floors[:, None] - floors[None, :]) == 1
+        inter_floor_gaps = np.where(neighbouring_floors, box_gaps(mins, maxs, (0, 1, 2)), np.inf)
+        kept |= k_nearest_mask(inter_floor_gaps, self.inter_floor_k) | (inter_floor_gaps <= self.inter_floor_gap)
+
+        np.fill_diagonal(kept, False)
+        return kept
@@ -0,0 +1,53 @@
+# Construction stages of SceneGraph in the order they run, a stage depends on the output of every stage before it
+STAGES = ["populate_rooms", "filter_outlier_objects", "room_bounds", "connect_rooms", "connect_rooms_through_closed_doors"]
+
+# First stage that reads each parameter, changing a parameter reruns that stage and every stage after it
+# The outlier filter drops objects from the table populate_rooms builds, so a new outlier_std repopulates the rooms first
+PARAMETER_STAGES = {
+    "min_room_dims": "populate_rooms",
+    "outlier_std": "populate_rooms",
+    "room_top_slack": "room_bounds",
+    "room_bottom_slack": "room_bounds",
+    "door_outside_offset": "connect_rooms_through_closed_doors",
+    "door_inside_offset": "connect_rooms_through_closed_doors",
+    "truncate_door_offsets": "connect_rooms_through_closed_doors",
+}
+
+
+# Thresholds used to build a SceneGraph, the defaults reproduce the released data
+# min_room_dims: regions whose object centroids span this or less on any axis are not made into rooms
+# outlier_std: objects further than this many standard deviations from their room's mean centroid on any axis are dropped
+# room_top_slack / room_bottom_slack: a point is in a room if it lies within its xz extent and no more than room_top_slack above
+#                                     its centroid and room_bottom_slack below the bottom of its box (i.e. centroid - dims)
+# door_outside_offset / door_inside_offset: distance from a door frame to the points sampled beyond it and inside its room
+# truncate_door_offsets: the door offsets have always been truncated to whole metres (so the 0.75m outside offset is 0),
+#                        set to False to sample at the offsets as given
+class GraphParameters:
+    def __init__(self, min_room_dims:float=0.1, outlier_std:float=2.5, room_top_slack:float=1.0, room_bottom_slack:float=0.5,
+                 door_outside_offset:float=0.75, door_inside_offset:float=1.0, truncate_door_offsets:bool=True):
+        self.min_room_dims = min_room_dims
+        self.outlier_std = outlier_std
+        self.room_top_slack = room_top_slack
+        self.room_bottom_slack = room_bottom_slack
+        self.door_outside_offset = door_outside_offset
+        self.door_inside_offset = door_inside_offset
+        self.truncate_door_offsets = truncate_door_offsets
+
+    # Returns a copy with the given parameters changed
+    def replace(self, **changes):
+        unknown = set(changes) - set(PARAMETER_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown graph parameters: {sorted(unknown)}")
+        return GraphParameters(**{**self.to_dict(), **changes})
+
+    # Names of the parameters that differ from other
+    def changed(self, other) -> list:
+        return [name for name in PARAMETER_STAGES if getattr(self, name) != getattr(other, name)]
+
+    # Earliest stage that has to be rerun to go from these parameters to other, None if they are the same
+    def first_changed_stage(self, other):
+        stages = [STAGES.index(PARAMETER_STAGES[name]) for name in self.changed(other)]
+        return STAGES[min(stages)] if stages else None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in PARAMETER_STAGES}
@@ -0,0 +1,231 @@
+import heapq
+import numpy as np
+
+
+# Lightweight stand-in for the habitat-sim pathfinder, implementing the Pathfinder protocol without habitat-sim or a GPU
+# The navigable area is a 2.5D occupancy grid: each (z, x) cell holds up to num_layers floor heights (NaN where not navigable)
+# Neighbouring cells are connected when their floor heights differ by no more than max_climb, islands are the connected components
+class GridPathfinder:
+    def __init__(self, heights, origin, cell_size:float, max_climb:float=0.2):
+        self.heights = np.asarray(heights, dtype=np.float32)
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        self.max_climb = float(max_climb)
+
+        # Index each navigable cell as a graph node
+        walkable = ~np.isnan(self.heights)
+        self.node_index = np.full(self.heights.shape, -1, dtype=np.int64)
+        self.node_index[walkable] = np.arange(np.count_nonzero(walkable))
+        layer, row, col = np.nonzero(walkable)
+        self.node_positions = np.stack([
+            self.origin[0] + (col + 0.5) * self.cell_size,
+            self.heights[layer, row, col],
+            self.origin[1] + (row + 0.5) * self.cell_size], axis=1).astype(np.float32)
+
+        self.neighbour_ptr, self.neighbours, self.neighbour_costs = self.build_neighbours()
+        self.node_islands = self.label_islands()
+
+    @property
+    def num_islands(self) -> int:
+        if len(self.node_islands) == 0:
+            return 0
+        return int(self.node_islands.max()) + 1
+
+    # Creates a pathfinder from rectangular floor areas, each given as (x_min, z_min, x_max, z_max, y)
+    # Cells whose centres lie within a rectangle are navigable at the rectangle's height
+    @classmethod
+    def from_floor_plan(cls, rectangles, cell_size:float=0.1, max_climb:float=0.2, layer_gap:float=1.0):
+        rectangles = np.asarray(rectangles, dtype=np.float64).reshape(-1, 5)
+        origin = rectangles[:, [0, 1]].min(axis=0)
+        samples = []
+        for x_min, z_min, x_max, z_max, y in rectangles:
+            cols = np.arange(np.ceil((x_min - origin[0]) / cell_size - 0.5), np.floor((x_max - origin[0]) / cell_size - 0.5) + 1)
+            rows = np.arange(np.ceil((z_min - origin[1]) / cell_size - 0.5), np.floor((z_max - origin[1]) / cell_size - 0.5) + 1)
+            col_grid, row_grid = np.meshgrid(cols, rows)
+            samples.append(np.stack([row_grid.ravel(), col_grid.ravel(), np.full(col_grid.size, y)], axis=1))
+        return cls.from_samples(np.concatenate(samples), origin, cell_size, max_climb, layer_gap)
+
+    # Creates a pathfinder by rasterising navmesh triangles, e.g. the output of habitat-sim's pathfinder.build_navmesh_vertices()
+    # Every three consecutive vertices form a triangle
+    @classmethod
+    def from_navmesh_vertices(cls, vertices, cell_size:float=0.1, max_climb:float=0.2, layer_gap:float=1.0):
+        triangles = np.asarray(vertices, dtype=np.float64).reshape(-1, 3, 3)
+        origin = triangles[:, :, [0, 2]].reshape(-1, 2).min(axis=0)
+        samples = []
+        for a, b, c in triangles:
+            xz = np.array([a[[0, 2]], b[[0, 2]], c[[0, 2]]]) - origin
+            lo = np.ceil(xz.min(axis=0) / cell_size - 0.5)
+            hi = np.floor(xz.max(axis=0) / cell_size - 0.5)
+            col_grid, row_grid = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1))
+            cols, rows = col_grid.ravel(), row_grid.ravel()
+            if len(cols) == 0:
+                continue
+
+            # Barycentric coordinates of the cell centres within the triangle
+            centres = np.stack([(cols + 0.5) * cell_size, (rows + 0.5) * cell_size], axis=1)
+            v0, v1 = xz[1] - xz[0], xz[2] - xz[0]
+            denom = v0[0] * v1[1] - v1[0] * v0[1]
+            if abs(denom) < 1e-12:
+                continue
+            d = centres - xz[0]
+            u = (d[:, 0] * v1[1] - v1[0] * d[:, 1]) / denom
+            v = (v0[0] * d[:, 1] - d[:, 0] * v0[1]) / denom
+            inside = (u >= -1e-6) & (v >= -1e-6) & (u + v <= 1 + 1e-6)
+            y = a[1] + u * (b[1] - a[1]) + v * (c[1] - a[1])
+            samples.append(np.stack([rows[inside], cols[inside], y[inside]], axis=1))
+
+        samples = np.concatenate(samples) if samples else np.zeros((0, 3))
+        return cls.from_samples(samples, origin, cell_size, max_climb, layer_gap)
+
+    # Creates a pathfinder from (row, col, y) floor samples, samples in the same cell more than layer_gap apart become separate layers
+    @classmethod
+    def from_samples(cls, samples, origin, cell_size:float, max_climb:float=0.2, layer_gap:float=1.0):
+        samples = np.asarray(samples, dtype=np.float64).reshape(-1, 3)
+        rows, cols, y = samples[:, 0].astype(np.int64), samples[:, 1].astype(np.int64), samples[:, 2]
+        num_rows = rows.max() + 1 if len(rows) else 0
+        num_cols = cols.max() + 1 if len(cols) else 0
+
+        # Sort samples by cell then height and start a new layer wherever the height jumps by more than layer_gap
+        cell = rows * num_cols + cols
+        order = np.lexsort((y, cell))
+        cell, y = cell[order], y[order]
+        new_cell = np.ones(len(cell), dtype=bool)
+        new_cell[1:] = cell[1:] != cell[:-1]
+        new_layer = new_cell.copy()
+        new_layer[1:] |= np.diff(y) > layer_gap
+        layer_count = np.cumsum(new_layer)
+        cell_start = np.maximum.accumulate(np.where(new_cell, np.arange(len(cell)), 0))
+        layer = layer_count - layer_count[cell_start]
+
+        num_layers = layer.max() + 1 if len(layer) else 1
+        heights = np.full((num_layers, num_rows, num_cols), -np.inf, dtype=np.float32)
+        np.maximum.at(heights, (layer, cell // max(num_cols, 1), cell % max(num_cols, 1)), y)
+        heights[np.isneginf(heights)] = np.nan
+        return cls(heights, origin, cell_size, max_climb)
+
+    # Loads a pathfinder saved with save() or a .npy file of navmesh triangle vertices (see utils.save_navmesh_vertices)
+    @classmethod
+    def load(cls, path:str, cell_size:float=0.1, max_climb:float=0.2):
+        if path.endswith('.npy'):
+            return cls.from_navmesh_vertices(np.load(path), cell_size, max_climb)
+        data = np.load(path)
+        return cls(data['heights'], data['origin'], float(data['cell_size']), float(data['max_climb']))
+
+    def save(self, path:str):
+        np.savez_compressed(path, heights=self.heights, origin=self.origin, cell_size=self.cell_size, max_climb=self.max_climb)
+
+    # Builds the CSR neighbour lists of the node graph, cells are 4-connected across any pair of layers within max_climb
+    def build_neighbours(self):
+        num_layers = self.heights.shape[0]
+        sources, targets = [], []
+        for d_row, d_col in [(0, 1), (1, 0)]:
+            for layer_a in range(num_layers):
+                for layer_b in range(num_layers):
+                    a = self.node_index[layer_a, :self.heights.shape[1] - d_row, :self.heights.shape[2] - d_col]
+                    b = self.node_index[layer_b, d_row:, d_col:]
+                    height_a = self.heights[layer_a, :self.heights.shape[1] - d_row, :self.heights.shape[2] - d_col]
+                    height_b = self.heights[layer_b, d_row:, d_col:]
+                    connected = (a >= 0) & (b >= 0) & (np.abs(height_a - height_b) <= self.max_climb)
+                    sources.append(a[connected])
+                    targets.append(b[connected])
+
+        # Edges are undirected so store both directions
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+        sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+        order = np.argsort(sources, kind='stable')
+        sources, targets = sources[order], targets[order]
+        ptr = np.zeros(len(self.node_positions) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self.node_positions)), out=ptr[1:])
+        costs = np.linalg.norm(self.node_positions[targets] - self.node_positions[sources], axis=1)
+        return ptr, targets, costs
+
+    # Labels the connected components of the node graph by propagating the minimum node index with pointer jumping
+    # Islands are numbered in order of their lowest node index
+    def label_islands(self) -> np.ndarray:
+        labels = np.arange(len(self.node_positions))
+        sources = np.repeat(np.arange(len(self.node_positions)), np.diff(self.neighbour_ptr))
+        while True:
+            new_labels = labels.copy()
+            np.minimum.at(new_labels, sources, labels[self.neighbours])
+            while True:
+                jumped = new_labels[new_labels]
+                if np.array_equal(jumped, new_labels):
+                    break
+                new_labels = jumped
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+        _, islands = np.unique(labels, return_inverse=True)
+        return islands.astype(np.int64)
+
+    # Returns the index of the node closest to the given point, optionally restricted to one island, or -1 if there is none
+    def nearest_node(self, point, island_index:int=-1) -> int:
+        candidates = np.arange(len(self.node_positions))
+        if island_index >= 0:
+            candidates = candidates[self.node_islands == island_index]
+        if len(candidates) == 0:
+            return -1
+        distances = np.sum((self.node_positions[candidates] - np.asarray(point, dtype=np.float32)) ** 2, axis=1)
+        return int(candidates[np.argmin(distances)])
+
+    # Like habitat-sim, returns a NaN point if the island has no navigable cells
+    def snap_point(self, point, island_index:int=-1) -> np.ndarray:
+        node = self.nearest_node(point, island_index)
+        if node < 0:
+            return np.full(3, np.nan, dtype=np.float32)
+        return self.node_positions[node].copy()
+
+    def get_island(self, point) -> int:
+        node = self.nearest_node(point)
+        if node < 0:
+            return -1
+        return int(self.node_islands[node])
+
+    # A* search over the node graph between the nodes closest to start and end
+    # Collinear intermediate cells are dropped so paths contain only their corner points, as habitat-sim's do
+    def find_path(self, start, end) -> list:
+        start_node = self.nearest_node(start)
+        end_node = self.nearest_node(end)
+        if start_node < 0 or end_node < 0 or self.node_islands[start_node] != self.node_islands[end_node]:
+            return []
+
+        goal = self.node_positions[end_node]
+        costs = {start_node: 0.0}
+        parents = {start_node: -1}
+        open_set = [(0.0, start_node)]
+        while open_set:
+            _, node = heapq.heappop(open_set)
+            if node == end_node:
+                break
+            for edge in range(self.neighbour_ptr[node], self.neighbour_ptr[node + 1]):
+                neighbour = int(self.neighbours[edge])
+                cost = costs[node] + self.neighbour_costs[edge]
+                if cost < costs.get(neighbour, np.inf):
+                    costs[neighbour] = cost
+                    parents[neighbour] = node
+                    heuristic = np.sqrt(np.sum((self.node_positions[neighbour] - goal) ** 2))
+                    heapq.heappush(open_set, (cost + heuristic, neighbour))
+
+        if end_node not in parents:
+            return []
+        nodes = [end_node]
+        while parents[nodes[-1]] >= 0:
+            nodes.append(parents[nodes[-1]])
+        points = self.node_positions[nodes[::-1]]
+
+        if len(points) > 2:
+            directions = np.diff(points, axis=0)
+            corners = np.any(np.abs(directions[1:] - directions[:-1]) > 1e-6, axis=1)
+            points = points[np.concatenate([[True], corners, [True]])]
+        return [point.copy() for point in points]
+
+    # Returns two triangles per navigable cell (every three consecutive vertices form a triangle)
+    def build_navmesh_vertices(self, island_index:int=-1) -> list:
+        nodes = np.arange(len(self.node_positions))
+        if island_index >= 0:
+            nodes = nodes[self.node_islands == island_index]
+        half = self.cell_size / 2
+        offsets = np.array([[-half, 0, -half], [half, 0, -half], [half, 0, half],
+                            [-half, 0, -half], [half, 0, half], [-half, 0, half]], dtype=np.float32)
+        vertices = (self.node_positions[nodes, None, :] + offsets).reshape(-1, 3)
+        return list(vertices)
@@ -0,0 +1,171 @@
+import os
+import yaml
+import numpy as np
+import scipy.sparse as sp
+import multiprocessing as mp
+from utils import YamlLoader, YamlDumper
+
+LABEL_DATA_DIR = '../data/label_data'
+
+
+def load_scene_yaml(path:str):
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=YamlLoader)
+
+# Reads the label_data YAML files of the given scenes (all scenes if None), in parallel across forked workers unless num_workers is 1
+# Returns {scene name: scene dict}
+def load_label_data(label_dir:str=LABEL_DATA_DIR, scenes=None, num_workers:int=None) -> dict:
+    if scenes is None:
+        scenes = sorted(f for f in os.listdir(label_dir) if f.endswith('.yaml'))
+    paths = [os.path.join(label_dir, scene) for scene in scenes]
+    if len(paths) > 1 and num_workers != 1:
+        with mp.get_context("fork").Pool(num_workers) as pool:
+            data = pool.map(load_scene_yaml, paths)
+    else:
+        data = [load_scene_yaml(path) for path in paths]
+    return {os.path.splitext(scene)[0]: scene_data for scene, scene_data in zip(scenes, data)}
+
+
+# Sparse (num_rooms, num_categories) matrix counting the objects of each category in every room of a set of label_data scenes
+# Rooms of all scenes share one index in scene order, room_scenes gives the scene of each row and labels its label (None if unlabelled)
+class RoomCategoryMatrix:
+    def __init__(self, counts:sp.csr_matrix, categories:list, labels:list, scene_names:list, room_scenes:np.ndarray):
+        self.counts = counts
+        self.categories = categories
+        self.labels = labels
+        self.scene_names = scene_names
+        self.room_scenes = room_scenes
+
+    # Builds the matrix in one pass over the flattened object lists, the category names are interned with np.unique
+    # Pass the categories of an existing matrix to use its vocabulary (objects of other categories are then ignored)
+    @classmethod
+    def from_scenes(cls, scenes:dict, categories:list=None):
+        rooms = [room for scene in scenes.values() for room in scene['rooms'].values()]
+        objects_per_room = np.array([len(room.get('objects') or []) for room in rooms], dtype=np.int64)
+        object_names = np.array([name for room in rooms for name in (room.get('objects') or [])], dtype=str)
+        rows = np.repeat(np.arange(len(rooms)), objects_per_room)
+
+        if categories is None:
+            categories, columns = np.unique(object_names, return_inverse=True)
+            categories = categories.tolist()
+        else:
+            lookup = {category: i for i, category in enumerate(categories)}
+            columns = np.array([lookup.get(name, -1) for name in object_names], dtype=np.int64)
+            rows, columns = rows[columns >= 0], columns[columns >= 0]
+
+        counts = sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns.reshape(-1))), shape=(len(rooms), len(categories)))
+        room_scenes = np.repeat(np.arange(len(scenes)), [len(scene['rooms']) for scene in scenes.values()])
+        return cls(counts, list(categories), [room.get('label') for room in rooms], list(scenes.keys()), room_scenes)
+
+    def __len__(self):
+        return self.counts.shape[0]
+
+    def labelled_mask(self) -> np.ndarray:
+        return np.array([label is not None for label in self.labels], dtype=bool)
+
+
+# k-nearest-neighbour room label suggester
+# Rooms are compared by the cosine similarity of their tf-idf weighted (log) category counts, and each label is scored by the
+# summed similarity of the k most similar labelled rooms that carry it
+class LabelSuggester:
+    def __init__(self, k:int=10):
+        self.k = k
+
+    # Trains on the labelled rooms of a RoomCategoryMatrix
+    def fit(self, features:RoomCategoryMatrix):
+        labelled = np.flatnonzero(features.labelled_mask())
+        self.categories = features.categories
+        self.label_names, self.room_label_ids = np.unique(np.array([features.labels[i] for i in labelled], dtype=str), return_inverse=True)
+        self.room_label_ids = self.room_label_ids.reshape(-1)
+        self.room_scenes = features.room_scenes[labelled]
+        self.scene_names = features.scene_names
+
+        counts = features.counts[labelled]
+        document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+        self.idf = np.log((1 + counts.shape[0]) / (1 + document_frequency)).astype(np.float32) + 1
+        self.room_weights = self.weights(counts)
+        return self
+
+    # Row normalised tf-idf weights of a count matrix with the training vocabulary
+    def weights(self, counts:sp.csr_matrix) -> sp.csr_matrix:
+        weights = counts.copy().astype(np.float32)
+        weights.data = np.log1p(weights.data)
+        weights = weights @ sp.diags(self.idf)
+        norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).reshape(-1))
+        return sp.diags(1 / np.maximum(norms, 1e-12)) @ weights
+
+    # Returns a (num_rooms, num_labels) matrix of label scores for the rooms of a matrix built with the training vocabulary
+    # Training rooms from scenes with the same names as the query scenes are never used (e.g. for leave-one-scene-out evaluation)
+    def scores(self, features:RoomCategoryMatrix) -> np.ndarray:
+        similarities = np.asarray((self.weights(features.counts) @ self.room_weights.T).todense())
+        query_scenes = np.array(features.scene_names, dtype=object)[features.room_scenes]
+        training_scenes = np.array(self.scene_names, dtype=object)[self.room_scenes]
+        similarities[query_scenes[:, None] == training_scenes[None, :]] = -np.inf
+
+        k = min(self.k, similarities.shape[1])
+        scores = np.zeros((len(features), len(self.label_names)), dtype=np.float64)
+        if k == 0:
+            return scores
+        nearest = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        nearest_similarities = np.take_along_axis(similarities, nearest, axis=1)
+        rows = np.repeat(np.arange(len(features)), k)
+        valid = np.isfinite(nearest_similarities.ravel()) & (nearest_similarities.ravel() > 0)
+        np.add.at(scores, (rows[valid], self.room_label_ids[nearest.ravel()[valid]]), nearest_similarities.ravel()[valid])
+        return scores
+
+    # Returns the ranked [(label, score), ...] suggestions of every room, scores are normalised to sum to 1 over a room's suggestions
+    # Rooms with no objects in the training vocabulary get no suggestions
+    def suggest(self, features:RoomCategoryMatrix, top:int=3) -> list:
+        scores = self.scores(features)
+        totals = scores.sum(axis=1, keepdims=True)
+        scores = np.divide(scores, totals, out=np.zeros_like(scores), where=totals > 0)
+        ranked = np.argsort(-scores, axis=1, kind='stable')[:, :top]
+        return [[(str(self.label_names[label]), float(scores[room, label])) for label in ranked[room] if scores[room, label] > 0]
+                for room in range(len(features))]
+
+    # Leave-one-scene-out top-n accuracy over the labelled rooms of a matrix (every room is scored against the other scenes only)
+    def evaluate(self, features:RoomCategoryMatrix, top:int=3) -> dict:
+        labelled = features.labelled_mask()
+        suggestions = self.suggest(features, top)
+        hits = np.zeros(top, dtype=np.int64)
+        for room in np.flatnonzero(labelled):
+            ranked = [label for label, _ in suggestions[room]]
+            if features.labels[room] in ranked:
+                hits[ranked.index(features.labels[room]):] += 1
+        return {"rooms": int(labelled.sum()), **{f"top_{n + 1}_accuracy": round(float(hits[n]) / max(labelled.sum(), 1), 4) for n in range(top)}}
+
+
+# Fills in the label of every unlabelled room of a label_data YAML file with its top suggestion and lists the ranked suggestions
+# under label_suggestions so the annotator only has to confirm or pick another one. Rooms that already have a label are left alone
+# Returns the number of rooms that were pre-filled
+def prefill_labels(path:str, suggester:LabelSuggester, top:int=3) -> int:
+    data = load_scene_yaml(path)
+    scene = os.path.splitext(os.path.basename(path))[0]
+    suggestions = suggester.suggest(RoomCategoryMatrix.from_scenes({scene: data}, suggester.categories), top)
+
+    prefilled = 0
+    for room_key, ranked in zip(list(data['rooms'].keys()), suggestions):
+        room = data['rooms'][room_key]
+        if room.get('label') is not None or not ranked:
+            continue
+        # Keep label_suggestions next to label, the release conversion drops it
+        fields = {key: value for key, value in room.items() if key not in ('label', 'label_suggestions')}
+        data['rooms'][room_key] = {'label': ranked[0][0], 'label_suggestions': [label for label, _ in ranked], **fields}
+        prefilled += 1
+
+    if prefilled > 0:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            yaml.dump(data, f, Dumper=YamlDumper, sort_keys=False, default_flow_style=False)
+        os.replace(tmp_path, path)
+    return prefilled
+
+# Trains a suggester on every labelled room in label_data except those of the given scene files and pre-fills their labels
+# Returns {scene file: number of rooms pre-filled}
+def prefill_scene_labels(scenes, label_dir:str=LABEL_DATA_DIR, k:int=10, top:int=3, num_workers:int=None) -> dict:
+    training_scenes = sorted(f for f in os.listdir(label_dir) if f.endswith('.yaml') and f not in scenes)
+    features = RoomCategoryMatrix.from_scenes(load_label_data(label_dir, training_scenes, num_workers))
+    if not features.labelled_mask().any():
+        return {scene: 0 for scene in scenes}
+    suggester = LabelSuggester(k).fit(features)
+    return {scene: prefill_labels(os.path.join(label_dir, scene), suggester, top) for scene in scenes}
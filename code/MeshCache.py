@@ -0,0 +1,128 @@
+import os
+import numpy as np
+from utils import file_hash
+from RoomBounds import RoomBounds
+
+MESH_CACHE_DIR = '../data/mesh_cache'
+
+# Triangle budget of each level of detail, level 0 keeps the full resolution mesh
+LOD_TRIANGLE_BUDGETS = [None, 500000, 200000, 50000]
+
+# Rotation that aligns the HM3D OBJ meshes (z up) with the habitat-sim / Open3D coordinate system (y up)
+OBJ_ROTATION = np.array([
+    [1, 0, 0],
+    [0, 0, 1],
+    [0, -1, 0]], dtype=np.float64)
+
+
+# Compact, pre-rotated scene mesh with per-vertex colours baked from the OBJ textures
+# Stored on disk as an uncompressed .npz so loading is a straight read of three arrays
+class CachedMesh:
+    def __init__(self, vertices, triangles, vertex_colours):
+        self.vertices = np.asarray(vertices, dtype=np.float32)
+        self.triangles = np.asarray(triangles, dtype=np.int32)
+        self.vertex_colours = np.asarray(vertex_colours, dtype=np.uint8)
+
+    # Converts a textured or vertex coloured Open3D mesh, the mesh is rotated into the habitat-sim coordinate system
+    @classmethod
+    def from_open3d(cls, mesh):
+        vertices = np.asarray(mesh.vertices) @ OBJ_ROTATION.T
+        triangles = np.asarray(mesh.triangles)
+
+        if mesh.has_textures() and mesh.has_triangle_uvs():
+            vertex_colours = bake_vertex_colours(triangles, len(vertices), np.asarray(mesh.triangle_uvs),
+                                                 np.asarray(mesh.triangle_material_ids), [np.asarray(texture) for texture in mesh.textures])
+        elif mesh.has_vertex_colors():
+            vertex_colours = np.asarray(mesh.vertex_colors) * 255
+        else:
+            vertex_colours = np.full((len(vertices), 3), 180)
+        return cls(vertices, triangles, np.clip(np.round(vertex_colours), 0, 255))
+
+    def to_open3d(self):
+        import open3d as o3d
+        mesh = o3d.geometry.TriangleMesh(o3d.utility.Vector3dVector(self.vertices.astype(np.float64)),
+                                         o3d.utility.Vector3iVector(self.triangles))
+        mesh.vertex_colors = o3d.utility.Vector3dVector(self.vertex_colours / 255.0)
+        mesh.compute_vertex_normals()
+        return mesh
+
+    @classmethod
+    def load(cls, path:str):
+        data = np.load(path)
+        return cls(data['vertices'], data['triangles'], data['vertex_colours'])
+
+    def save(self, path:str):
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, vertices=self.vertices, triangles=self.triangles, vertex_colours=self.vertex_colours)
+        os.replace(tmp_path, path)
+
+    # Reduces the mesh to at most target_triangles using Open3D's quadric decimation
+    def decimate(self, target_triangles:int):
+        if len(self.triangles) <= target_triangles:
+            return self
+        decimated = self.to_open3d().simplify_quadric_decimation(target_number_of_triangles=int(target_triangles))
+        return CachedMesh(np.asarray(decimated.vertices), np.asarray(decimated.triangles),
+                          np.clip(np.round(np.asarray(decimated.vertex_colors) * 255), 0, 255))
+
+    # Keeps only the triangles whose centroid lies within one of the given rooms (same test as SceneRoom.contains_point)
+    def crop(self, rooms, chunk_size:int=1000000):
+        bounds = RoomBounds(rooms)
+        keep = np.zeros(len(self.triangles), dtype=bool)
+        for start in range(0, len(self.triangles), chunk_size):
+            centroids = self.vertices[self.triangles[start:start + chunk_size]].mean(axis=1)
+            keep[start:start + chunk_size] = bounds.contains(centroids).any(axis=1)
+
+        # Drop the vertices that are no longer referenced
+        triangles = self.triangles[keep]
+        used, remapped = np.unique(triangles, return_inverse=True)
+        return CachedMesh(self.vertices[used], remapped.reshape(-1, 3), self.vertex_colours[used])
+
+
+# Averages the texture colour at each triangle corner onto the corner's vertex
+def bake_vertex_colours(triangles, num_vertices:int, triangle_uvs, material_ids, textures):
+    corner_uvs = triangle_uvs.reshape(-1, 2)
+    corner_materials = np.repeat(material_ids, 3) if len(material_ids) == len(triangles) else np.zeros(len(corner_uvs), dtype=np.int64)
+    corner_colours = np.full((len(corner_uvs), 3), 180.0)
+
+    for material, texture in enumerate(textures):
+        selected = corner_materials == material
+        if texture.size == 0 or not np.any(selected):
+            continue
+        height, width = texture.shape[:2]
+        uv = corner_uvs[selected] % 1.0
+        x = np.clip(np.round(uv[:, 0] * (width - 1)).astype(np.int64), 0, width - 1)
+        y = np.clip(np.round((1.0 - uv[:, 1]) * (height - 1)).astype(np.int64), 0, height - 1)
+        texels = texture[y, x]
+        corner_colours[selected] = texels[:, :3] if texels.ndim == 2 else texels[:, None]
+
+    corner_vertices = np.asarray(triangles).ravel()
+    colour_sums = np.zeros((num_vertices, 3))
+    np.add.at(colour_sums, corner_vertices, corner_colours)
+    counts = np.bincount(corner_vertices, minlength=num_vertices)[:, None]
+    return np.where(counts > 0, colour_sums / np.maximum(counts, 1), 180.0)
+
+# Cache files are keyed by the hash of the source OBJ and the level of detail
+def mesh_cache_path(mesh_path:str, lod:int, cache_dir:str=MESH_CACHE_DIR) -> str:
+    name = os.path.splitext(os.path.basename(mesh_path))[0]
+    return os.path.join(cache_dir, name + '.' + file_hash(mesh_path)[:16] + '.lod' + str(lod) + '.npz')
+
+# Returns the pre-rotated scene mesh at the given level of detail, building and caching it on first use
+# Decimated levels are built from the cached full resolution mesh so the OBJ is parsed at most once
+def load_scene_mesh(mesh_path:str, lod:int=0, cache_dir:str=MESH_CACHE_DIR) -> CachedMesh:
+    if not 0 <= lod < len(LOD_TRIANGLE_BUDGETS):
+        raise ValueError(f"Level of detail must be between 0 and {len(LOD_TRIANGLE_BUDGETS) - 1}, got {lod}")
+    cache_path = mesh_cache_path(mesh_path, lod, cache_dir)
+    if os.path.exists(cache_path):
+        return CachedMesh.load(cache_path)
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    if lod == 0:
+        import open3d as o3d
+        mesh = CachedMesh.from_open3d(o3d.io.read_triangle_mesh(mesh_path, True))
+    else:
+        mesh = load_scene_mesh(mesh_path, 0, cache_dir).decimate(LOD_TRIANGLE_BUDGETS[lod])
+
+    mesh.save(cache_path)
+    return mesh
@@ -0,0 +1,39 @@
+import numpy as np
+from Pathfinder import Pathfinder
+
+
+# Triangle vertices of each navmesh island, extracted from the pathfinder only when an island is first accessed
+# The island count is read from the pathfinder up front so len() never extracts any vertices
+# Call materialize() before the pathfinder's simulator is closed if the vertices will be needed afterwards, then release()
+class NavmeshIslands:
+    def __init__(self, pathfinder:Pathfinder=None):
+        self.pathfinder = pathfinder
+        self.num_islands = pathfinder.num_islands if pathfinder is not None else 0
+        self.vertices = {}
+
+    def __len__(self):
+        return self.num_islands
+
+    # Returns the island's vertices as an (N, 3) float32 array
+    def __getitem__(self, island_index:int) -> np.ndarray:
+        if not 0 <= island_index < self.num_islands:
+            raise IndexError(f"Navmesh island {island_index} out of range ({self.num_islands} islands)")
+        if island_index not in self.vertices:
+            if self.pathfinder is None:
+                raise RuntimeError(f"Navmesh island {island_index} was not extracted before the pathfinder was released")
+            vertices = self.pathfinder.build_navmesh_vertices(island_index)
+            self.vertices[island_index] = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        return self.vertices[island_index]
+
+    def __iter__(self):
+        return (self[i] for i in range(self.num_islands))
+
+    # Extracts the vertices of every island that has not been accessed yet
+    def materialize(self):
+        for i in range(self.num_islands):
+            self[i]
+        return self
+
+    # Drops the reference to the pathfinder (e.g. before the simulator is closed), islands not yet extracted become unavailable
+    def release(self):
+        self.pathfinder = None
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Signs of the box corners relative to the centre, in the same order as SceneRoom.get_corners
+CORNER_SIGNS = np.array([
+    [-1, -1, -1],
+    [1, -1, -1],
+    [1, -1, 1],
+    [-1, -1, 1],
+    [-1, 1, -1],
+    [1, 1, -1],
+    [1, 1, 1],
+    [-1, 1, 1]], dtype=np.float32)
+
+UNKNOWN_CATEGORIES = ["Unknown", "unknown"]
+
+
+# Structure-of-arrays table of the semantic objects in a scene
+# Category names are interned, category_ids index into categories
+# Rows are kept grouped by room_ids (the habitat-sim region index when loaded, the SceneGraph room index once rooms are built)
+# so the objects of a room are the contiguous slice of rows given by group_bounds
+class ObjectTable:
+    def __init__(self, centroids, sizes, category_ids, room_ids, categories):
+        self.centroids = np.asarray(centroids, dtype=np.float32).reshape(-1, 3)
+        self.sizes = np.asarray(sizes, dtype=np.float32).reshape(-1, 3)
+        self.category_ids = np.asarray(category_ids, dtype=np.int32).reshape(-1)
+        self.room_ids = np.asarray(room_ids, dtype=np.int32).reshape(-1)
+        self.categories = list(categories)
+
+    # Reads every object of every region of a habitat-sim semantic scene (or an object with the same regions/objects structure)
+    @classmethod
+    def from_semantic_scene(cls, semantic_scene):
+        centroids, sizes, category_ids, region_ids = [], [], [], []
+        category_lookup = {}
+        for region_index, region in enumerate(semantic_scene.regions):
+            for obj in region.objects:
+                centroids.append(obj.aabb.center)
+                sizes.append(obj.aabb.sizes)
+                category_ids.append(category_lookup.setdefault(obj.category.name(), len(category_lookup)))
+                region_ids.append(region_index)
+        return cls(np.array(centroids, dtype=np.float32), np.array(sizes, dtype=np.float32), category_ids, region_ids, category_lookup)
+
+    def __len__(self):
+        return len(self.centroids)
+
+    def label(self, index:int) -> str:
+        return self.categories[self.category_ids[index]]
+
+    def labels(self, rows=slice(None)) -> list:
+        return [self.categories[category_id] for category_id in self.category_ids[rows]]
+
+    def category_id(self, category:str) -> int:
+        return self.categories.index(category) if category in self.categories else -1
+
+    # Returns a new table with the selected rows (boolean mask or indices), the category names are shared
+    def select(self, rows):
+        return ObjectTable(self.centroids[rows], self.sizes[rows], self.category_ids[rows], self.room_ids[rows], self.categories)
+
+    # Objects with a zero centroid, zero size or an unknown category are invalid
+    def valid_mask(self) -> np.ndarray:
+        unknown_ids = [self.category_id(category) for category in UNKNOWN_CATEGORIES]
+        return (np.any(self.centroids != 0, axis=1) &
+                np.any(self.sizes != 0, axis=1) &
+                ~np.isin(self.category_ids, unknown_ids))
+
+    # Returns the room id of each group of consecutive rows along with the start and stop row of the group
+    def group_bounds(self):
+        if len(self) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        starts = np.flatnonzero(np.r_[True, self.room_ids[1:] != self.room_ids[:-1]])
+        stops = np.r_[starts[1:], len(self)]
+        return self.room_ids[starts], starts, stops
+
+    # Minimum and maximum object centroid of each group (see group_bounds)
+    def group_extents(self, starts):
+        return np.minimum.reduceat(self.centroids, starts, axis=0), np.maximum.reduceat(self.centroids, starts, axis=0)
+
+    # Marks the objects whose centroid is within num_std standard deviations of their group's mean centroid on every axis
+    def inlier_mask(self, num_std:float=2.5) -> np.ndarray:
+        _, starts, stops = self.group_bounds()
+        if len(starts) == 0:
+            return np.zeros(0, dtype=bool)
+        counts = (stops - starts)[:, None]
+        centroids = self.centroids.astype(np.float64)
+        means = np.add.reduceat(centroids, starts, axis=0) / counts
+        deviations = centroids - np.repeat(means, counts[:, 0], axis=0)
+        std_devs = np.sqrt(np.add.reduceat(deviations**2, starts, axis=0) / counts)
+        return np.all(np.abs(deviations) < num_std * np.repeat(std_devs, counts[:, 0], axis=0), axis=1)
+
+    # World corners of the bounding boxes of the given rows as an (N, 8, 3) array, or (8, 3) for a single row
+    def corners(self, rows=slice(None)) -> np.ndarray:
+        half_sizes = self.sizes[rows] / 2
+        return self.centroids[rows][..., None, :] + CORNER_SIGNS * half_sizes[..., None, :]
@@ -0,0 +1,215 @@
+import os
+import json
+import struct
+import numpy as np
+
+# Headless builders for the SceneRenderer overlays
+# Each overlay layer is built as one merged triangle mesh or line set by instancing a template primitive with NumPy,
+# so a layer costs a single add_geometry call however many markers it contains, or a single mesh in an exported .glb file (see write_glb)
+
+# Edges of a box given its corners in the order produced by SceneRoom.get_corners / ObjectTable.corners
+BOX_EDGES = np.array([
+    [0, 1], [1, 2], [2, 3], [3, 0],    # Bottom face
+    [4, 5], [5, 6], [6, 7], [7, 4],    # Top face
+    [0, 4], [1, 5], [2, 6], [3, 7]])   # Vertical edges
+
+
+# Merged triangle mesh with per-vertex colours
+class TriangleLayer:
+    def __init__(self, vertices, triangles, colours):
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.triangles = np.asarray(triangles, dtype=np.int32).reshape(-1, 3)
+        self.colours = np.asarray(colours, dtype=np.float64).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.triangles)
+
+# Merged line set with per-line colours
+class LineLayer:
+    def __init__(self, points, lines, colours):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.lines = np.asarray(lines, dtype=np.int32).reshape(-1, 2)
+        self.colours = np.asarray(colours, dtype=np.float64).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.lines)
+
+
+# Unit cube centred on the origin
+def box_template():
+    vertices = np.array([
+        [0, 0, 0], [1, 0, 0], [0, 0, 1], [1, 0, 1],
+        [0, 1, 0], [1, 1, 0], [0, 1, 1], [1, 1, 1]], dtype=np.float64) - 0.5
+    triangles = np.array([
+        [4, 7, 5], [4, 6, 7], [0, 2, 4], [2, 6, 4],
+        [0, 1, 2], [1, 3, 2], [1, 5, 7], [1, 7, 3],
+        [2, 3, 7], [2, 7, 6], [0, 4, 1], [1, 4, 5]], dtype=np.int32)
+    return vertices, triangles
+
+# Unit radius UV sphere centred on the origin with the given number of latitude bands (2 * resolution longitude segments)
+def sphere_template(resolution:int=6):
+    theta = np.linspace(0, np.pi, resolution + 1)[1:-1]
+    phi = np.linspace(0, 2 * np.pi, 2 * resolution, endpoint=False)
+    theta_grid, phi_grid = np.meshgrid(theta, phi, indexing='ij')
+    ring_vertices = np.stack([np.sin(theta_grid) * np.cos(phi_grid), np.cos(theta_grid), np.sin(theta_grid) * np.sin(phi_grid)], axis=-1).reshape(-1, 3)
+    vertices = np.concatenate([[[0, 1, 0]], ring_vertices, [[0, -1, 0]]])
+
+    segments = 2 * resolution
+    bottom = len(vertices) - 1
+    seg = np.arange(segments)
+    next_seg = (seg + 1) % segments
+    triangles = [np.stack([np.zeros(segments, dtype=np.int64), 1 + next_seg, 1 + seg], axis=1)]
+    for ring in range(resolution - 2):
+        a = 1 + ring * segments + seg
+        b = 1 + ring * segments + next_seg
+        c = a + segments
+        d = b + segments
+        triangles.append(np.stack([a, b, c], axis=1))
+        triangles.append(np.stack([b, d, c], axis=1))
+    last_ring = 1 + (resolution - 2) * segments
+    triangles.append(np.stack([np.full(segments, bottom), last_ring + seg, last_ring + next_seg], axis=1))
+    return vertices, np.concatenate(triangles).astype(np.int32)
+
+# Broadcasts a single colour or a per-instance list of colours to a (count, 3) array
+def instance_colours(colours, count:int) -> np.ndarray:
+    colours = np.asarray(colours, dtype=np.float64)
+    if colours.ndim == 1:
+        colours = np.broadcast_to(colours, (count, 3))
+    return colours.reshape(count, 3)
+
+# Places a copy of the template at every position
+# scales can be a scalar, an xyz scale shared by all instances or per instance with shape (count, 1) or (count, 3)
+def instance_template(template, positions, scales, colours) -> TriangleLayer:
+    template_vertices, template_triangles = template
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    count = len(positions)
+    scales = np.broadcast_to(np.asarray(scales, dtype=np.float64), (count, 3))
+
+    vertices = template_vertices[None, :, :] * scales[:, None, :] + positions[:, None, :]
+    triangles = template_triangles[None, :, :] + (np.arange(count) * len(template_vertices))[:, None, None]
+    colours = np.repeat(instance_colours(colours, count), len(template_vertices), axis=0)
+    return TriangleLayer(vertices, triangles, colours)
+
+# Boxes with the given centres and dimensions
+def boxes(positions, dims, colours) -> TriangleLayer:
+    return instance_template(box_template(), positions, dims, colours)
+
+# Spheres with the given centres and radius
+def spheres(positions, radius, colours, resolution:int=6) -> TriangleLayer:
+    return instance_template(sphere_template(resolution), positions, radius, colours)
+
+# Wireframes of boxes given as an (N, 8, 3) array of corners
+def bounding_boxes(corners, colours) -> LineLayer:
+    corners = np.asarray(corners, dtype=np.float64).reshape(-1, 8, 3)
+    count = len(corners)
+    lines = BOX_EDGES[None, :, :] + (np.arange(count) * 8)[:, None, None]
+    colours = np.repeat(instance_colours(colours, count), len(BOX_EDGES), axis=0)
+    return LineLayer(corners.reshape(-1, 3), lines, colours)
+
+# Independent line segments from starts[i] to ends[i]
+def segments(starts, ends, colours) -> LineLayer:
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 3)
+    count = len(starts)
+    points = np.stack([starts, ends], axis=1).reshape(-1, 3)
+    lines = np.arange(2 * count).reshape(-1, 2)
+    return LineLayer(points, lines, instance_colours(colours, count))
+
+# Lines joining successive points of each polyline, colours are given per polyline
+def polylines(point_lists, colours) -> LineLayer:
+    point_lists = [np.asarray(points, dtype=np.float64).reshape(-1, 3) for points in point_lists]
+    lengths = np.array([len(points) for points in point_lists], dtype=np.int64)
+    if lengths.sum() == 0:
+        return LineLayer(np.zeros((0, 3)), np.zeros((0, 2)), np.zeros((0, 3)))
+    points = np.concatenate(point_lists)
+    starts = np.arange(len(points) - 1)
+    # Drop the segments that would join the end of one polyline to the start of the next
+    polyline_ends = np.cumsum(lengths) - 1
+    keep = ~np.isin(starts, polyline_ends)
+    lines = np.stack([starts, starts + 1], axis=1)[keep]
+    line_colours = np.repeat(instance_colours(colours, len(point_lists)), np.maximum(lengths - 1, 0), axis=0)
+    return LineLayer(points, lines, line_colours)
+
+# Concatenates layers of the same type into one
+def merge(layers):
+    layers = [layer for layer in layers if len(layer) > 0]
+    if not layers:
+        return None
+    if isinstance(layers[0], TriangleLayer):
+        offsets = np.cumsum([0] + [len(layer.vertices) for layer in layers[:-1]])
+        return TriangleLayer(np.concatenate([layer.vertices for layer in layers]),
+                             np.concatenate([layer.triangles + offset for layer, offset in zip(layers, offsets)]),
+                             np.concatenate([layer.colours for layer in layers]))
+    offsets = np.cumsum([0] + [len(layer.points) for layer in layers[:-1]])
+    return LineLayer(np.concatenate([layer.points for layer in layers]),
+                     np.concatenate([layer.lines + offset for layer, offset in zip(layers, offsets)]),
+                     np.concatenate([layer.colours for layer in layers]))
+
+
+# glTF primitive modes and accessor component types
+GLTF_LINES = 1
+GLTF_TRIANGLES = 4
+GLTF_FLOAT = 5126
+GLTF_UNSIGNED_INT = 5125
+
+# Writes named layers to a binary glTF (.glb) file, one mesh node per layer with per-vertex colours
+# Line layers are written with two vertices per line so each line keeps its own colour
+# Both glTF and habitat-sim use a right-handed, y up coordinate system so points are written as they are
+def write_glb(path:str, layers:dict):
+    nodes, meshes, accessors, buffer_views, chunks = [], [], [], [], []
+    offset = 0
+
+    def add_accessor(array, component_type, accessor_type, target, bounds=False):
+        nonlocal offset
+        data = np.ascontiguousarray(array).tobytes()
+        buffer_views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(data), "target": target})
+        chunks.append(data + b'\x00' * (-len(data) % 4))
+        offset += len(chunks[-1])
+        accessor = {"bufferView": len(buffer_views) - 1, "componentType": component_type, "count": len(array), "type": accessor_type}
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    for name, layer in layers.items():
+        if layer is None or len(layer) == 0:
+            continue
+        if isinstance(layer, TriangleLayer):
+            positions, colours, indices, mode = layer.vertices, layer.colours, layer.triangles.reshape(-1), GLTF_TRIANGLES
+        else:
+            positions = layer.points[layer.lines.reshape(-1)]
+            colours, indices, mode = np.repeat(layer.colours, 2, axis=0), np.arange(2 * len(layer.lines)), GLTF_LINES
+        primitive = {
+            "attributes": {
+                "POSITION": add_accessor(positions.astype(np.float32), GLTF_FLOAT, "VEC3", 34962, bounds=True),
+                "COLOR_0": add_accessor(colours.astype(np.float32), GLTF_FLOAT, "VEC3", 34962),
+            },
+            "indices": add_accessor(indices.astype(np.uint32), GLTF_UNSIGNED_INT, "SCALAR", 34963),
+            "mode": mode,
+        }
+        meshes.append({"name": name, "primitives": [primitive]})
+        nodes.append({"name": name, "mesh": len(meshes) - 1})
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "DomestiGraph"},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(nodes)))}],
+        "nodes": nodes,
+        "meshes": meshes,
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+        "buffers": [{"byteLength": offset}],
+    }
+    json_chunk = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    binary_chunk = b''.join(chunks)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack('<4sII', b'glTF', 2, 12 + 8 + len(json_chunk) + 8 + len(binary_chunk)))
+        f.write(struct.pack('<I4s', len(json_chunk), b'JSON'))
+        f.write(json_chunk)
+        f.write(struct.pack('<I4s', len(binary_chunk), b'BIN\x00'))
+        f.write(binary_chunk)
+    os.replace(tmp_path, path)
@@ -0,0 +1,216 @@
+import os
+import json
+import yaml
+import hashlib
+import numpy as np
+
+PACKED_DATASET_PATH = '../data/release_data.pack'
+
+# Use the libyaml C implementation when PyYAML was built with it
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+MAGIC = b'DGPK'
+VERSION = 1
+ALIGNMENT = 64
+PREFIX_SIZE = 12   # magic, version and header length
+
+# SHA-1 of a file's contents, read in chunks so large meshes are not loaded into memory at once
+def file_hash(path:str) -> str:
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+def align(num_bytes:int) -> int:
+    return -(-num_bytes // ALIGNMENT) * ALIGNMENT
+
+# Packed, memory-mappable form of the whole release dataset
+# All scenes are concatenated into flat arrays:
+#   centroids, dims        float32 (num_rooms, 3)
+#   label_ids              int32   (num_rooms,)      index into labels, -1 for unlabelled rooms
+#   scene_offsets          int64   (num_scenes + 1,) rooms of scene s are scene_offsets[s]:scene_offsets[s+1]
+#   edge_ptr, edge_indices CSR adjacency over global room indices, one entry per connection in the YAML
+#   scene_edge_offsets     int64   (num_scenes + 1,) edges of scene s are scene_edge_offsets[s]:scene_edge_offsets[s+1]
+# The file is a small JSON header followed by the 64-byte aligned raw arrays so every array is a zero-copy view of one memory map
+class PackedDataset:
+    def __init__(self, path:str=PACKED_DATASET_PATH):
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8, mode='r')
+
+        if bytes(self.buffer[:4]) != MAGIC:
+            raise ValueError(path + " is not a packed DomestiGraph dataset")
+        version, header_length = np.frombuffer(self.buffer[4:PREFIX_SIZE], dtype='<u4', count=2)
+        if version != VERSION:
+            raise ValueError("Unsupported packed dataset version " + str(version))
+        header = json.loads(bytes(self.buffer[PREFIX_SIZE:PREFIX_SIZE + header_length]).decode('utf-8'))
+        data_start = align(PREFIX_SIZE + int(header_length))
+
+        self.labels = header['labels']
+        self.scene_names = header['scenes']
+        # Content hash of each release file the dataset was packed from (None for datasets packed before they were stored)
+        self.source_hashes = header.get('source_hashes')
+        self.scene_lookup = {name: i for i, name in enumerate(self.scene_names)}
+
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape']))
+            start = data_start + spec['offset']
+            view = self.buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+            setattr(self, name, view)
+
+    @property
+    def num_scenes(self) -> int:
+        return len(self.scene_names)
+
+    @property
+    def num_rooms(self) -> int:
+        return len(self.label_ids)
+
+    def scene_index(self, scene) -> int:
+        if isinstance(scene, str):
+            return self.scene_lookup[scene]
+        return int(scene)
+
+    # Returns the global room indices of the given scene as a slice
+    def room_slice(self, scene) -> slice:
+        s = self.scene_index(scene)
+        return slice(int(self.scene_offsets[s]), int(self.scene_offsets[s + 1]))
+
+    # Returns the connections of the given scene as an (num_edges, 2) array of scene-local room indices (0-based)
+    def scene_edges(self, scene) -> np.ndarray:
+        rooms = self.room_slice(scene)
+        ptr = self.edge_ptr[rooms.start:rooms.stop + 1]
+        sources = np.repeat(np.arange(rooms.stop - rooms.start), np.diff(ptr))
+        targets = self.edge_indices[ptr[0]:ptr[-1]] - rooms.start
+        return np.stack([sources, targets], axis=1)
+
+    # Rebuilds the release YAML structure of the given scene
+    def scene_to_dict(self, scene):
+        rooms = self.room_slice(scene)
+        out = {'rooms': {}}
+        for local_index, room_index in enumerate(range(rooms.start, rooms.stop)):
+            label_id = self.label_ids[room_index]
+            out['rooms']['room_' + str(local_index + 1)] = {
+                'label': self.labels[label_id] if label_id >= 0 else None,
+                'centroid': dict(zip('xyz', self.centroids[room_index].tolist())),
+                'dims': dict(zip('xyz', self.dims[room_index].tolist())),
+            }
+        out['connections'] = (self.scene_edges(scene) + 1).tolist()
+        return out
+
+
+# Packs every scene YAML in release_dir into a single file at path
+def write_packed_dataset(release_dir:str='../data/release_data', path:str=PACKED_DATASET_PATH):
+    scene_files = sorted(f for f in os.listdir(release_dir) if f.endswith('.yaml'))
+
+    scene_names = []
+    centroids, dims, labels, scene_offsets = [], [], [], [0]
+    edge_sources, edge_targets = [], []
+
+    for scene_file in scene_files:
+        with open(os.path.join(release_dir, scene_file), 'r') as f:
+            data = yaml.load(f, Loader=YamlLoader)
+
+        room_keys = list(data['rooms'].keys())
+        if room_keys != ['room_' + str(i + 1) for i in range(len(room_keys))]:
+            raise ValueError(scene_file + ": rooms must be numbered room_1 to room_N in order")
+
+        for room in data['rooms'].values():
+            centroids.append([room['centroid'][axis] for axis in 'xyz'])
+            dims.append([room['dims'][axis] for axis in 'xyz'])
+            labels.append(room['label'])
+
+        connections = np.asarray(data['connections'] or [], dtype=np.int64).reshape(-1, 2)
+        edge_sources.append(connections[:, 0] - 1 + scene_offsets[-1])
+        edge_targets.append(connections[:, 1] - 1 + scene_offsets[-1])
+
+        scene_names.append(os.path.splitext(scene_file)[0])
+        scene_offsets.append(scene_offsets[-1] + len(room_keys))
+
+    num_rooms = scene_offsets[-1]
+    vocabulary = sorted(set(label for label in labels if label is not None))
+    label_lookup = {label: i for i, label in enumerate(vocabulary)}
+
+    # Stable sort keeps the YAML order of each room's connections
+    edge_sources = np.concatenate(edge_sources) if edge_sources else np.zeros(0, dtype=np.int64)
+    edge_targets = np.concatenate(edge_targets) if edge_targets else np.zeros(0, dtype=np.int64)
+    order = np.argsort(edge_sources, kind='stable')
+    edge_ptr = np.zeros(num_rooms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edge_sources, minlength=num_rooms), out=edge_ptr[1:])
+    scene_offsets = np.asarray(scene_offsets, dtype=np.int64)
+
+    arrays = {
+        'centroids': np.asarray(centroids, dtype=np.float32).reshape(-1, 3),
+        'dims': np.asarray(dims, dtype=np.float32).reshape(-1, 3),
+        'label_ids': np.asarray([label_lookup[label] if label is not None else -1 for label in labels], dtype=np.int32),
+        'scene_offsets': scene_offsets,
+        'edge_ptr': edge_ptr,
+        'edge_indices': edge_targets[order].astype(np.int32),
+        'scene_edge_offsets': edge_ptr[scene_offsets],
+    }
+
+    # Lay out the arrays after the header, each aligned so the loader can view them in place
+    # Offsets in the header are relative to the start of the data section, which begins at the first aligned byte after the header
+    source_hashes = {scene_file: file_hash(os.path.join(release_dir, scene_file)) for scene_file in scene_files}
+    header = {'labels': vocabulary, 'scenes': scene_names, 'source_hashes': source_hashes, 'arrays': {}}
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += align(array.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = align(PREFIX_SIZE + len(header_bytes))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([VERSION, len(header_bytes)], dtype='<u4').tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+# Release files that were added, removed or changed since the dataset was packed, compared by content hash rather than
+# modification time (a fresh checkout sets arbitrary mtimes). Returns an empty list if the packed dataset is up to date
+def stale_release_files(release_dir:str='../data/release_data', path:str=PACKED_DATASET_PATH) -> list:
+    hashes = {f: file_hash(os.path.join(release_dir, f)) for f in sorted(os.listdir(release_dir)) if f.endswith('.yaml')}
+    if not os.path.exists(path):
+        return sorted(hashes)
+    packed_hashes = PackedDataset(path).source_hashes or {}
+    return sorted(f for f in set(hashes) | set(packed_hashes) if hashes.get(f) != packed_hashes.get(f))
+
+# Checks that every scene in the packed dataset matches its YAML file (values compared at float32 precision)
+# Returns a list of mismatch descriptions, empty if the round trip is exact
+# Pass a list of scene file names to only compare those scenes
+def verify_packed_dataset(release_dir:str='../data/release_data', path:str=PACKED_DATASET_PATH, scene_files=None):
+    dataset = PackedDataset(path)
+    errors = []
+    all_scene_files = sorted(f for f in os.listdir(release_dir) if f.endswith('.yaml'))
+    if [os.path.splitext(f)[0] for f in all_scene_files] != dataset.scene_names:
+        errors.append("scene list differs")
+    if scene_files is None:
+        scene_files = all_scene_files
+
+    for scene_file in scene_files:
+        scene = os.path.splitext(scene_file)[0]
+        if scene not in dataset.scene_lookup:
+            continue
+        with open(os.path.join(release_dir, scene_file), 'r') as f:
+            expected = yaml.load(f, Loader=YamlLoader)
+        packed = dataset.scene_to_dict(scene)
+
+        if list(expected['rooms'].keys()) != list(packed['rooms'].keys()):
+            errors.append(scene + ": rooms differ")
+            continue
+        for key, room in expected['rooms'].items():
+            if room['label'] != packed['rooms'][key]['label']:
+                errors.append(scene + ": " + key + " label differs")
+            for field in ['centroid', 'dims']:
+                expected_values = np.array([room[field][axis] for axis in 'xyz'], dtype=np.float32)
+                packed_values = np.array([packed['rooms'][key][field][axis] for axis in 'xyz'], dtype=np.float32)
+                if not np.array_equal(expected_values, packed_values):
+                    errors.append(scene + ": " + key + " " + field + " differs")
+        if sorted(map(tuple, expected['connections'] or [])) != sorted(map(tuple, packed['connections'])):
+            errors.append(scene + ": connections differ")
+    return errors
@@ -0,0 +1,63 @@
+import numpy as np
+from typing import Protocol
+
+
+# The navigation queries SceneGraph needs from a navmesh
+# Points are (x, y, z) arrays in habitat-sim world coordinates (y up)
+class Pathfinder(Protocol):
+    @property
+    def num_islands(self) -> int: ...
+
+    # Returns the closest navigable point to the given point, restricted to the given island unless island_index is -1
+    def snap_point(self, point, island_index:int=-1) -> np.ndarray: ...
+
+    # Returns the index of the navmesh island the given point lies on
+    def get_island(self, point) -> int: ...
+
+    # Returns the points of the shortest path between two navigable points or an empty list if no path exists
+    def find_path(self, start, end) -> list: ...
+
+    # Returns the triangle vertices of the given navmesh island (all islands if island_index is -1)
+    def build_navmesh_vertices(self, island_index:int=-1) -> list: ...
+
+
+# Adapts a habitat_sim.PathFinder (e.g. sim.pathfinder) to the Pathfinder protocol
+class HabitatPathfinder:
+    def __init__(self, pathfinder):
+        import habitat_sim as hs
+        self.pathfinder = pathfinder
+        self.shortest_path_type = hs.ShortestPath
+
+    @property
+    def num_islands(self) -> int:
+        return self.pathfinder.num_islands
+
+    # Returned as a NumPy array rather than a magnum vector so scene graphs can be pickled (e.g. sent back from a worker process)
+    def snap_point(self, point, island_index:int=-1) -> np.ndarray:
+        return np.array(self.pathfinder.snap_point(point, island_index), dtype=np.float32)
+
+    def get_island(self, point) -> int:
+        return self.pathfinder.get_island(point)
+
+    def find_path(self, start, end) -> list:
+        path = self.shortest_path_type()
+        path.requested_start = start
+        path.requested_end = end
+        if self.pathfinder.find_path(path):
+            return path.points
+        return []
+
+    def build_navmesh_vertices(self, island_index:int=-1) -> list:
+        return self.pathfinder.build_navmesh_vertices(island_index)
+
+
+# Loads a pathfinder from a navmesh file, habitat-sim .navmesh files or GridPathfinder files (see GridPathfinder.load)
+def load_pathfinder(path:str) -> Pathfinder:
+    if path.endswith('.navmesh'):
+        import habitat_sim as hs
+        pathfinder = hs.PathFinder()
+        if not pathfinder.load_nav_mesh(path):
+            raise IOError("Could not load navmesh " + path)
+        return HabitatPathfinder(pathfinder)
+    from GridPathfinder import GridPathfinder
+    return GridPathfinder.load(path)
@@ -0,0 +1,79 @@
+import numpy as np
+from Pathfinder import Pathfinder
+from Profiler import StageProfiler
+
+
+def point_key(point) -> bytes:
+    return np.asarray(point, dtype=np.float64).reshape(3).tobytes()
+
+
+# Results of the navmesh queries made while building a scene graph, keyed by the exact query points
+# A room whose extents did not change samples the same points, so when a graph is rebuilt with new parameters (see
+# SceneGraph.update_parameters) its snaps and the paths between it and other unchanged rooms are reused rather than recomputed
+class PathfinderCache:
+    def __init__(self):
+        self.islands = {}
+        self.snapped_points = {}
+        self.paths = {}
+
+    def __len__(self):
+        return len(self.islands) + len(self.snapped_points) + len(self.paths)
+
+    def clear(self):
+        self.islands.clear()
+        self.snapped_points.clear()
+        self.paths.clear()
+
+
+# Wraps a Pathfinder so every query is answered from a PathfinderCache where possible, hits are counted as "cached_find_path" etc.
+# (wrap a CountingPathfinder to count the queries that reach the navmesh)
+class CachedPathfinder:
+    def __init__(self, pathfinder:Pathfinder, cache:PathfinderCache, profiler:StageProfiler=None):
+        self.pathfinder = pathfinder
+        self.cache = cache
+        self.profiler = profiler if profiler is not None else StageProfiler(enabled=False)
+
+    @property
+    def num_islands(self) -> int:
+        return self.pathfinder.num_islands
+
+    def snap_point(self, point, island_index:int=-1):
+        key = (point_key(point), island_index)
+        if key in self.cache.snapped_points:
+            self.profiler.count("cached_snap_point")
+        else:
+            self.cache.snapped_points[key] = self.pathfinder.snap_point(point, island_index)
+        return self.cache.snapped_points[key]
+
+    def get_island(self, point) -> int:
+        key = point_key(point)
+        if key in self.cache.islands:
+            self.profiler.count("cached_get_island")
+        else:
+            self.cache.islands[key] = self.pathfinder.get_island(point)
+        return self.cache.islands[key]
+
+    def find_path(self, start, end) -> list:
+        key = (point_key(start), point_key(end))
+        if key in self.cache.paths:
+            self.profiler.count("cached_find_path")
+        else:
+            self.cache.paths[key] = self.pathfinder.find_path(start, end)
+        return self.cache.paths[key]
+
+    # The (start, end) queries that are not cached yet, duplicates are only returned once
+    def missing_paths(self, queries) -> list:
+        missing = {}
+        for start, end in queries:
+            key = (point_key(start), point_key(end))
+            if key not in self.cache.paths and key not in missing:
+                missing[key] = (start, end)
+        return list(missing.values())
+
+    # Adds paths found elsewhere (e.g. by a PathfindingPool loaded from the same navmesh) to the cache
+    def store_paths(self, queries, paths):
+        for (start, end), path in zip(queries, paths):
+            self.cache.paths[(point_key(start), point_key(end))] = path
+
+    def build_navmesh_vertices(self, island_index:int=-1) -> list:
+        return self.pathfinder.build_navmesh_vertices(island_index)
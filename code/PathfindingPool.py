@@ -0,0 +1,60 @@
+import numpy as np
+import multiprocessing as mp
+from Pathfinder import load_pathfinder
+
+# Pathfinder of the current worker process and the navmesh file it was loaded from
+worker_pathfinder = None
+worker_navmesh_path = None
+
+def init_worker(navmesh_path:str):
+    global worker_pathfinder, worker_navmesh_path
+    if navmesh_path is not None and navmesh_path != worker_navmesh_path:
+        worker_pathfinder = load_pathfinder(navmesh_path)
+        worker_navmesh_path = navmesh_path
+
+# Answers a chunk of (start, end) queries on the given navmesh, paths are returned as (N, 3) float32 arrays (empty if there is no path)
+def find_path_chunk(args):
+    navmesh_path, queries = args
+    init_worker(navmesh_path)
+    paths = []
+    for start, end in queries:
+        path = worker_pathfinder.find_path(start, end)
+        paths.append(np.asarray(path, dtype=np.float32).reshape(-1, 3))
+    return paths
+
+
+# Pool of worker processes that answer find_path queries in parallel, each worker loads its own pathfinder from the same navmesh file
+# Queries are split into contiguous chunks and the results are returned in query order, so callers see the same paths as serial execution
+# Uses the "fork" start method like the batch mode workers (main.py has no __main__ guard)
+# The pool can be started before the navmesh file exists (navmesh_path=None) so that it is forked before any simulator, the workers
+# then load the navmesh given to set_navmesh on their first queries
+class PathfindingPool:
+    def __init__(self, navmesh_path:str, num_workers:int, chunks_per_worker:int=4):
+        self.navmesh_path = navmesh_path
+        self.num_workers = num_workers
+        self.chunks_per_worker = chunks_per_worker
+        self.pool = mp.get_context("fork").Pool(num_workers, initializer=init_worker, initargs=(navmesh_path,))
+
+    def set_navmesh(self, navmesh_path:str):
+        self.navmesh_path = navmesh_path
+
+    def find_paths(self, queries) -> list:
+        queries = [(np.asarray(start), np.asarray(end)) for start, end in queries]
+        if not queries:
+            return []
+        chunk_size = int(np.ceil(len(queries) / (self.num_workers * self.chunks_per_worker)))
+        chunks = [queries[start:start + chunk_size] for start in range(0, len(queries), chunk_size)]
+        if self.navmesh_path is None:
+            raise ValueError("No navmesh set for the pathfinding pool, see set_navmesh")
+        chunks = [(self.navmesh_path, chunk) for chunk in chunks]
+        return [path for paths in self.pool.map(find_path_chunk, chunks) for path in paths]
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
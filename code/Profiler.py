@@ -0,0 +1,82 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from Pathfinder import Pathfinder
+
+PROFILE_DIR = '../data/profiles'
+
+# Records the wall time of each stage of scene graph construction along with event counters
+# A disabled profiler makes stage() and count() no-ops so it can always be passed around
+class StageProfiler:
+    def __init__(self, enabled:bool=True):
+        self.enabled = enabled
+        self.stage_times = {}
+        self.counts = {}
+        self.stage_counts = {}
+        self.current_stage = None
+
+    @contextmanager
+    def stage(self, name:str):
+        if not self.enabled:
+            yield
+            return
+        previous_stage = self.current_stage
+        self.current_stage = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + time.perf_counter() - start
+            self.current_stage = previous_stage
+
+    # Counts are kept in total and per stage
+    def count(self, name:str, amount:int=1):
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + int(amount)
+            if self.current_stage is not None:
+                stage_counts = self.stage_counts.setdefault(self.current_stage, {})
+                stage_counts[name] = stage_counts.get(name, 0) + int(amount)
+
+    def to_dict(self):
+        return {
+            "stages": {name: round(seconds, 6) for name, seconds in self.stage_times.items()},
+            "total_seconds": round(sum(self.stage_times.values()), 6),
+            "counts": dict(self.counts),
+            "stage_counts": {name: dict(counts) for name, counts in self.stage_counts.items()},
+        }
+
+    # Writes the profile as a JSON record, any keyword arguments (e.g. scene name, room count) are stored alongside it
+    def save(self, path:str, **metadata):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, 'w') as f:
+            json.dump({**metadata, **self.to_dict()}, f, indent=4)
+
+
+# Wraps a Pathfinder and counts the navmesh queries made through it
+class CountingPathfinder:
+    def __init__(self, pathfinder:Pathfinder, profiler:StageProfiler):
+        self.pathfinder = pathfinder
+        self.profiler = profiler
+
+    @property
+    def num_islands(self) -> int:
+        return self.pathfinder.num_islands
+
+    def snap_point(self, point, island_index:int=-1):
+        self.profiler.count("snap_point")
+        return self.pathfinder.snap_point(point, island_index)
+
+    def get_island(self, point) -> int:
+        self.profiler.count("get_island")
+        return self.pathfinder.get_island(point)
+
+    def find_path(self, start, end) -> list:
+        self.profiler.count("find_path")
+        return self.pathfinder.find_path(start, end)
+
+    def build_navmesh_vertices(self, island_index:int=-1) -> list:
+        self.profiler.count("build_navmesh_vertices")
+        return self.pathfinder.build_navmesh_vertices(island_index)
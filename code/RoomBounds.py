@@ -0,0 +1,32 @@
+import numpy as np
+
+
+# Structure-of-arrays table of the room extents used for point-in-room tests
+# Bounds are computed once from each room's world corners so whole paths can be tested against every room in a single broadcast
+# The vertical slack is the same as SceneRoom.contains_point (see GraphParameters)
+class RoomBounds:
+    def __init__(self, rooms, top_slack:float=1.0, bottom_slack:float=0.5):
+        corners = np.array([room.world_corners for room in rooms], dtype=np.float64).reshape(-1, 8, 3)
+        centroid_y = np.array([room.centroid[1] for room in rooms], dtype=np.float64)
+        dims_y = np.array([room.dims[1] for room in rooms], dtype=np.float64)
+
+        self.x_min = corners[:, :, 0].min(axis=1)
+        self.x_max = corners[:, :, 0].max(axis=1)
+        self.z_min = corners[:, :, 2].min(axis=1)
+        self.z_max = corners[:, :, 2].max(axis=1)
+
+        self.y_min = centroid_y - dims_y - bottom_slack
+        self.y_max = centroid_y + top_slack
+
+    def __len__(self):
+        return len(self.x_min)
+
+    # Returns a (num_points, num_rooms) boolean mask where mask[p, r] is True if point p lies in room r
+    def contains(self, points) -> np.ndarray:
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        x = points[:, 0, None]
+        y = points[:, 1, None]
+        z = points[:, 2, None]
+        return ((self.x_min <= x) & (x <= self.x_max) &
+                (self.z_min <= z) & (z <= self.z_max) &
+                (y <= self.y_max) & (y >= self.y_min))
@@ -1,81 +1,201 @@
 import numpy as np
-import habitat_sim as hs
 from SceneRoom import SceneRoom
-from SceneObject import SceneObject
+from ObjectTable import ObjectTable
+from RoomBounds import RoomBounds
+from NavmeshIslands import NavmeshIslands
+from CandidatePairs import CandidatePruning
+from PathfindingPool import PathfindingPool
+from Pathfinder import Pathfinder
+from Profiler import StageProfiler, CountingPathfinder
+from PathfinderCache import PathfinderCache, CachedPathfinder
+from GraphParameters import GraphParameters, STAGES
 
 class SceneGraph:
 
-    def __init__(self):
+    # Pass an enabled StageProfiler to record per-stage timings and pathfinder/containment counts
+    # Paths are densified by inserting midpoints unless path_spacing is given, in which case they are resampled every path_spacing metres
+    # along their length with at most max_path_points points
+    # With a CandidatePruning, connect_rooms only pathfinds between the room pairs it selects rather than every pair of rooms
+    # The thresholds used to build the graph are given by a GraphParameters, see update_parameters to change them afterwards
+    # With keep_pathfinder_cache the navmesh queries of each build are kept so update_parameters can reuse them, otherwise they are
+    # dropped once the graph is built
+    def __init__(self, profiler:StageProfiler=None, path_spacing:float=None, max_path_points:int=None, pruning:CandidatePruning=None,
+                 parameters:GraphParameters=None, keep_pathfinder_cache:bool=False):
+        self.profiler = profiler if profiler is not None else StageProfiler(enabled=False)
+        self.pruning = pruning
+        self.parameters = parameters if parameters is not None else GraphParameters()
+        self.path_spacing = path_spacing
+        self.max_path_points = max_path_points
         self.rooms = []
+        self.objects = None
         self.connections = {}
         self.snapped_points = {}
-        self.navmesh_islands = []
+        self.navmesh_islands = NavmeshIslands()
         self.door_snapped_points = []  
+        self.room_bounds = None
+        self.room_anchors = {}
+        self.candidate_pairs = None
+        self.valid_objects = None
+        self.room_regions = np.zeros(0, dtype=np.int32)
+        self.keep_pathfinder_cache = keep_pathfinder_cache
+        self.pathfinder_cache = PathfinderCache()
+        self.open_connections = {}
+        self.open_snapped_points = {}
 
-    def construct_graph(self, habSim:hs.Simulator):
-        self.populate_rooms(habSim.semantic_scene)
-        self.filter_outlier_objects()
-        self.connect_rooms(habSim)
-        self.connect_rooms_through_closed_doors(habSim)
-        self.connections = self.make_connections_symmetric()
-        self.sorted_connections = dict(sorted(self.connections.items()))
-        for i in range(habSim.pathfinder.num_islands):
-            self.navmesh_islands.append(habSim.pathfinder.build_navmesh_vertices(i))
+    # Builds the graph from a habitat-sim semantic scene (or an object with the same regions/objects structure) and a navmesh
+    # For habitat-sim use construct_graph(sim.semantic_scene, HabitatPathfinder(sim.pathfinder))
+    # Pass a PathfindingPool (loaded from the same navmesh) to run the find_path queries in parallel, the graph is identical to serial execution
+    def construct_graph(self, semantic_scene, pathfinder:Pathfinder, pool:PathfindingPool=None):
+        with self.profiler.stage("populate_rooms"):
+            self.valid_objects = self.load_objects(semantic_scene)
+        self.build(pathfinder, pool, STAGES[0])
+        # Island vertices are only extracted if they are drawn (see NavmeshIslands)
+        with self.profiler.stage("navmesh_islands"):
+            self.navmesh_islands = NavmeshIslands(pathfinder)
+
+    # Rebuilds the graph with new parameters without reloading the semantic scene
+    # Only the stages that depend on the changed parameters are rerun (see GraphParameters.PARAMETER_STAGES). For a graph created with
+    # keep_pathfinder_cache the navmesh queries of every build are kept in pathfinder_cache, so the snaps of rooms whose extents did not
+    # move and the paths between them are reused and only the rooms that moved, and the connections touching them, are pathfound again
+    # pathfinder must be the navmesh the graph was constructed with, returns the indices of the rooms that are new or whose extents moved
+    def update_parameters(self, parameters:GraphParameters, pathfinder:Pathfinder, pool:PathfindingPool=None) -> list:
+        first_stage = self.parameters.first_changed_stage(parameters)
+        self.parameters = parameters
+        if first_stage is None:
+            return []
+        previous_extents = {int(region): (room.centroid, room.dims) for region, room in zip(self.room_regions, self.rooms)}
+        self.build(pathfinder, pool, first_stage)
+
+        moved_rooms = []
+        for i, (region, room) in enumerate(zip(self.room_regions, self.rooms)):
+            previous = previous_extents.get(int(region))
+            if previous is None or not (np.array_equal(previous[0], room.centroid) and np.array_equal(previous[1], room.dims)):
+                moved_rooms.append(i)
+        return moved_rooms
+
+    # Runs the construction stages from first_stage onwards, the earlier stages' results are kept
+    def build(self, pathfinder:Pathfinder, pool:PathfindingPool, first_stage:str):
+        if self.profiler.enabled:
+            pathfinder = CountingPathfinder(pathfinder, self.profiler)
+        pathfinder = CachedPathfinder(pathfinder, self.pathfinder_cache, self.profiler)
+        first_stage = STAGES.index(first_stage)
+
+        if first_stage <= STAGES.index("populate_rooms"):
+            with self.profiler.stage("populate_rooms"):
+                self.populate_rooms(self.valid_objects)
+        if first_stage <= STAGES.index("filter_outlier_objects"):
+            with self.profiler.stage("filter_outlier_objects"):
+                self.filter_outlier_objects()
+        if first_stage <= STAGES.index("room_bounds"):
+            with self.profiler.stage("room_bounds"):
+                self.room_bounds = RoomBounds(self.rooms, self.parameters.room_top_slack, self.parameters.room_bottom_slack)
+            with self.profiler.stage("candidate_pairs"):
+                self.candidate_pairs = self.find_candidate_pairs()
+        if first_stage <= STAGES.index("connect_rooms"):
+            with self.profiler.stage("connect_rooms"):
+                self.room_anchors = {}
+                self.connections = {}
+                self.snapped_points = {}
+                self.connect_rooms(pathfinder, pool)
+                self.open_connections = dict(self.connections)
+                self.open_snapped_points = dict(self.snapped_points)
+        with self.profiler.stage("connect_rooms_through_closed_doors"):
+            self.connections = dict(self.open_connections)
+            self.snapped_points = dict(self.open_snapped_points)
+            self.door_snapped_points = []
+            self.connect_rooms_through_closed_doors(pathfinder, pool)
+        with self.profiler.stage("make_connections_symmetric"):
+            self.connections = self.make_connections_symmetric()
+            self.sorted_connections = dict(sorted(self.connections.items()))
+        if not self.keep_pathfinder_cache:
+            self.pathfinder_cache.clear()
 
     def make_connections_symmetric(self):
         symetric_connections = {}
         for (i, j) in self.connections:
             symetric_connections[(i, j)] = self.connections[(i, j)]
             if (j, i) not in self.connections:
-                symetric_connections[(j, i)] = self.connections[(i, j)].reverse()
+                symetric_connections[(j, i)] = self.connections[(i, j)][::-1]
         
         return symetric_connections
     
-    # Creates a SceneObject for each object in each room in habitat-sim semantic scene and creates a SceneRoom from the resulting SceneObjects
-    # Ignores any objects that have a category of "Unknown" or have a zero dimensions
-    # If a list of objects is empty, the SceneRoom is not created
-    def populate_rooms(self, habScene:hs.scene.SemanticScene):
-        for habRoom in habScene.regions:
-                objects = []
-                for habObject in habRoom.objects:
-                    if(np.array_equal(habObject.aabb.center, np.array([0.0, 0.0, 0.0])) or np.array_equal(habObject.aabb.sizes, np.array([0.0, 0.0, 0.0])) or habObject.category.name() in ["Unknown", "unknown"]):
-                        pass
-                    else:
-                        objects.append(SceneObject(habObject))
-                        
-                if(len(objects) != 0):
-                    room = SceneRoom(objects)
-                    if np.all(room.dims >0.1):
-                        self.rooms.append(room)
-
-    # Calculates the mean and standard deviation of the object centroids in each room and removes objects that are more than 2.5 standard deviations away from the mean
+    # Loads every object of the habitat-sim semantic scene into an ObjectTable, ignoring any objects that have a category of "Unknown"
+    # or have a zero dimensions. The room_ids of the table are the habitat-sim region indices
+    def load_objects(self, habScene):
+        table = ObjectTable.from_semantic_scene(habScene)
+        return table.select(table.valid_mask())
+
+    # Creates a SceneRoom from the objects of each region of the table
+    # If a region has no valid objects or its bounding box is not thicker than min_room_dims on every axis, the SceneRoom is not created
+    def populate_rooms(self, table:ObjectTable):
+        regions, starts, _ = table.group_bounds()
+        if len(starts) > 0:
+            min, max = table.group_extents(starts)
+            kept_regions = np.all(max - min > self.parameters.min_room_dims, axis=1)
+        else:
+            kept_regions = np.zeros(0, dtype=bool)
+        self.room_regions = regions[kept_regions]
+
+        # Drop the objects of the rejected regions and renumber the rest by room index
+        group_sizes = np.diff(np.r_[starts, len(table)])
+        table = table.select(np.repeat(kept_regions, group_sizes))
+        table.room_ids = np.repeat(np.arange(np.count_nonzero(kept_regions), dtype=np.int32), group_sizes[kept_regions])
+        self.objects = table
+
+        _, starts, stops = table.group_bounds()
+        self.rooms = [SceneRoom(table, start, stop) for start, stop in zip(starts, stops)]
+
+    # Calculates the mean and standard deviation of the object centroids in each room and removes objects that are more than outlier_std (2.5) standard deviations away from the mean
     # This is done to remove outlier objects that have been incorrectly assigned to a room that would otherwise result in invalid room bounding boxes
+    # A low outlier_std can remove every object of a room, such rooms are dropped (with their region) and the rest renumbered
     def filter_outlier_objects(self):
-        for room in self.rooms:
-            obj_centroids = np.array([obj.centroid for obj in room.objects])
-            obj_centroids = np.vstack(obj_centroids)
-            mean = np.mean(obj_centroids, axis=0)
-            std_dev = np.std(obj_centroids, axis=0)
-            distances = abs(obj_centroids - mean)
-            keep_objects = np.all(distances < 2.5*std_dev, axis=1)
-            room.objects = [room.objects[i] for i in range(len(room.objects)) if keep_objects[i]]
-            new_min, new_max = room.get_extents()
-            room.centroid = (new_min + new_max) / 2
-            room.dims = new_max - new_min
-            room.world_corners = room.get_corners(new_min, new_max)
+        objects = self.objects.select(self.objects.inlier_mask(self.parameters.outlier_std))
+        room_ids, starts, stops = objects.group_bounds()
+        self.rooms = [self.rooms[i] for i in room_ids]
+        self.room_regions = self.room_regions[room_ids]
+        objects.room_ids = np.repeat(np.arange(len(room_ids), dtype=np.int32), stops - starts)
+        self.objects = objects
+        for room, start, stop in zip(self.rooms, starts, stops):
+            room.set_objects(objects, start, stop)
     
+    # Returns an (R, R) boolean mask of the room pairs connect_rooms pathfinds between, every pair unless pruning is enabled
+    def find_candidate_pairs(self):
+        num_rooms = len(self.rooms)
+        if self.pruning is None:
+            return ~np.eye(num_rooms, dtype=bool)
+        candidates = self.pruning.candidates([room.centroid for room in self.rooms], [room.dims for room in self.rooms])
+        self.profiler.count("candidate_pairs", np.triu(candidates, 1).sum())
+        self.profiler.count("pruned_pairs", num_rooms * (num_rooms - 1) // 2 - np.triu(candidates, 1).sum())
+        return candidates
+
     # Connects rooms that are adjacent to each other
-    def connect_rooms(self, habSim:hs.Simulator):
+    # A path is only computed once per unordered room pair and island, the reverse direction reuses it
+    # The paths are all computed up front (see compute_pair_paths), the pairs are then visited in order as the replacement of connections
+    # that pass through an adjacent room depends on the order
+    def connect_rooms(self, pathfinder:Pathfinder, pool:PathfindingPool=None):
+        pair_paths = self.compute_pair_paths(pathfinder, pool)
         for i, room in enumerate(self.rooms):
             for j, other_room in enumerate(self.rooms):
-                if room != other_room:
-                    for k in range(habSim.pathfinder.num_islands):
-                        path, start_point, target_point = self.compute_path(room, other_room, k, habSim)
-                        if(path):
-                            if self.is_adjacent(room, other_room, path):
+                if room != other_room and self.candidate_pairs[i, j]:
+                    for k in range(pathfinder.num_islands):
+                        start_point, start_on_island = self.get_room_anchor(i, k, pathfinder)
+                        target_point, target_on_island = self.get_room_anchor(j, k, pathfinder)
+                        if not (start_on_island and target_on_island):
+                            continue
+
+                        if i < j:
+                            path = pair_paths[(i, j, k)]
+                        else:
+                            path = pair_paths.pop((j, i, k))[::-1]
+
+                        if len(path) > 0:
+                            room_mask = self.room_bounds.contains(path)
+                            self.profiler.count("path_points_tested", len(path))
+                            self.profiler.count("contains_point", room_mask.size)
+                            if self.is_adjacent(i, j, room_mask):
                                 self.snapped_points[(i, k)] = start_point
                                 if (i, j) not in self.connections and (j, i) not in self.connections:
-                                    passes_through_adjacent_room, connection = self.passes_through_adjacent_room(i, j, path)
+                                    passes_through_adjacent_room, connection = self.passes_through_adjacent_room(i, j, room_mask)
                                     if not passes_through_adjacent_room:
                                         self.connections[(i, j)] = path
                                     else:
@@ -89,108 +209,188 @@ class SceneGraph:
                                             self.connections[(i, j)] = path
     
     # Connects rooms that are separated by closed doors
-    def connect_rooms_through_closed_doors(self, habSim:hs.Simulator):
-        for i, room in enumerate(self.rooms):
-            for obj in room.objects:
-                if obj.label == "door frame":
-                    door_dir = np.argmin(obj.dims)
-                    outside_sample_dir = (obj.centroid[door_dir] - room.centroid[door_dir])/abs(obj.centroid[door_dir] - room.centroid[door_dir])
-                    inside_sample_dir = -outside_sample_dir
-
-                    outside_offset = np.array([0, 0, 0])
-                    outside_offset[door_dir] = outside_sample_dir * 0.75
-                    outside_offset[1] = -obj.dims[1]/2
-                    outside_sample_start = obj.centroid + outside_offset
-                    outside_island_index = habSim.pathfinder.get_island(outside_sample_start)
-                    outside_snapped_point = habSim.pathfinder.snap_point(outside_sample_start, outside_island_index)
-                    self.door_snapped_points.append([outside_island_index, outside_snapped_point])
-
-                    inside_offset = np.array([0, 0, 0])
-                    inside_offset[door_dir] = inside_sample_dir #* 0.75
-                    inside_offset[1] = -room.dims[1]/2
-                    inside_sample_start = obj.centroid + inside_offset
-                    inside_island_index = habSim.pathfinder.get_island(inside_sample_start)
-                    inside_snapped_point = habSim.pathfinder.snap_point(inside_sample_start, inside_island_index)
-                    self.door_snapped_points.append([inside_island_index, inside_snapped_point])
-
-                    if inside_island_index != outside_island_index:
-                        for j, other_room in enumerate(self.rooms):
-                            if other_room != room and other_room.contains_point(outside_snapped_point):
-                                room_snapped_point = habSim.pathfinder.snap_point(room.centroid - np.array([0,room.dims[1]/2,0]), inside_island_index)
-                                other_room_snapped_point = habSim.pathfinder.snap_point(other_room.centroid - np.array([0,other_room.dims[1]/2,0]), outside_island_index)
-
-                                path_a = hs.ShortestPath()
-                                path_a.requested_start = room_snapped_point
-                                path_a.requested_end = inside_snapped_point
-                                path_a_found = habSim.pathfinder.find_path(path_a)
-
-                                path_b = hs.ShortestPath()
-                                path_b.requested_start = outside_snapped_point
-                                path_b.requested_end = other_room_snapped_point
-                                path_b_found = habSim.pathfinder.find_path(path_b)
-
-                                if path_a_found and path_b_found:
-                                    self.connections[(i,j)] = (self.linear_interpolation(path_a.points) + self.linear_interpolation(path_b.points))
-                                    self.snapped_points[(i, inside_island_index)] = room_snapped_point
-                                    self.snapped_points[(j, outside_island_index)] = other_room_snapped_point
-    
-    # Computes a path (if it exists) between the source and target rooms on the specified navmesh island
-    def compute_path(self, sourceRoom, targetRoom, island_index, habSim:hs.Simulator):
-        start_point = habSim.pathfinder.snap_point(sourceRoom.centroid - np.array([0,sourceRoom.dims[1]/2,0]), island_index)
-        target_point = habSim.pathfinder.snap_point(targetRoom.centroid - np.array([0,targetRoom.dims[1]/2,0]), island_index)
-
-        if sourceRoom.contains_point(start_point) and targetRoom.contains_point(target_point):
-            path = hs.ShortestPath()
-            path.requested_start = start_point
-            path.requested_end = target_point
-            path_found = habSim.pathfinder.find_path(path)
+    # The sample points either side of every door frame in the scene are computed together and the rooms beyond all of the doors are
+    # found with a single RoomBounds lookup. Each pair of rooms is then pathfound once, through the last door frame linking them
+    # (earlier doors are only tried if its paths fail, as the connection through the last door used to overwrite the others)
+    # With a pool the paths through the last door of every pair are found in parallel
+    def connect_rooms_through_closed_doors(self, pathfinder:Pathfinder, pool:PathfindingPool=None):
+        doors = np.flatnonzero(self.objects.category_ids == self.objects.category_id("door frame"))
+        if len(doors) == 0:
+            return
+        door_rooms = self.objects.room_ids[doors]
+        outside_points, inside_points = self.door_sample_points(doors)
+
+        outside_islands, inside_islands = [], []
+        outside_snapped_points, inside_snapped_points = [], []
+        for outside_sample_start, inside_sample_start in zip(outside_points, inside_points):
+            outside_island_index = pathfinder.get_island(outside_sample_start)
+            outside_snapped_point = pathfinder.snap_point(outside_sample_start, outside_island_index)
+            self.door_snapped_points.append([outside_island_index, outside_snapped_point])
+
+            inside_island_index = pathfinder.get_island(inside_sample_start)
+            inside_snapped_point = pathfinder.snap_point(inside_sample_start, inside_island_index)
+            self.door_snapped_points.append([inside_island_index, inside_snapped_point])
+
+            outside_islands.append(outside_island_index)
+            inside_islands.append(inside_island_index)
+            outside_snapped_points.append(outside_snapped_point)
+            inside_snapped_points.append(inside_snapped_point)
+
+        # Rooms containing the outside point of each door that leads to a different navmesh island, excluding the door's own room
+        crossings = np.flatnonzero(np.array(inside_islands) != np.array(outside_islands))
+        far_rooms = self.room_bounds.contains(np.array([outside_snapped_points[k] for k in crossings], dtype=np.float64))
+        far_rooms[np.arange(len(crossings)), door_rooms[crossings]] = False
+        self.profiler.count("contains_point", far_rooms.size)
+
+        pair_doors = {}
+        for row, door in enumerate(crossings):
+            for j in np.flatnonzero(far_rooms[row]):
+                pair_doors.setdefault((int(door_rooms[door]), int(j)), []).append(door)
+
+        # Paths from each room to its side of the door and from the far side to the other room, through the last door of each pair
+        queries = []
+        for (i, j), pair_door_list in pair_doors.items():
+            door = pair_door_list[-1]
+            queries.append((self.get_room_anchor(i, inside_islands[door], pathfinder)[0], inside_snapped_points[door]))
+            queries.append((outside_snapped_points[door], self.get_room_anchor(j, outside_islands[door], pathfinder)[0]))
+        last_door_paths = self.find_paths(queries, pathfinder, pool)
+
+        for pair_index, ((i, j), pair_door_list) in enumerate(pair_doors.items()):
+            for attempt, door in enumerate(reversed(pair_door_list)):
+                inside_island_index, outside_island_index = inside_islands[door], outside_islands[door]
+                room_snapped_point, _ = self.get_room_anchor(i, inside_island_index, pathfinder)
+                other_room_snapped_point, _ = self.get_room_anchor(j, outside_island_index, pathfinder)
+
+                if attempt == 0:
+                    path_a, path_b = last_door_paths[2 * pair_index], last_door_paths[2 * pair_index + 1]
+                else:
+                    path_a = pathfinder.find_path(room_snapped_point, inside_snapped_points[door])
+                    path_b = pathfinder.find_path(outside_snapped_points[door], other_room_snapped_point)
+
+                if len(path_a) > 0 and len(path_b) > 0:
+                    self.connections[(i,j)] = np.concatenate([self.densify_path(path_a, 1), self.densify_path(path_b, 1)])
+                    self.snapped_points[(i, inside_island_index)] = room_snapped_point
+                    self.snapped_points[(j, outside_island_index)] = other_room_snapped_point
+                    break
+
+    # Returns the points sampled outside and inside the given door frame rows of the object table, as two (N, 3) arrays
+    # The points are offset along the door's thinnest axis (away from / towards its room's centroid) and down towards the floor
+    # By default the offsets are truncated to whole metres as they always have been, so the 0.75m outside offset is 0 (see GraphParameters)
+    def door_sample_points(self, doors):
+        offset = np.trunc if self.parameters.truncate_door_offsets else np.asarray
+        centroids = self.objects.centroids[doors].astype(np.float64)
+        sizes = self.objects.sizes[doors]
+        room_centroids = np.array([room.centroid for room in self.rooms])[self.objects.room_ids[doors]]
+        room_heights = np.array([room.dims[1] for room in self.rooms])[self.objects.room_ids[doors]]
+
+        rows = np.arange(len(doors))
+        door_dirs = np.argmin(sizes, axis=1)
+        outside_sample_dirs = np.sign(centroids[rows, door_dirs] - room_centroids[rows, door_dirs])
+        inside_sample_dirs = -outside_sample_dirs
+
+        outside_offsets = np.zeros((len(doors), 3))
+        outside_offsets[rows, door_dirs] = offset(outside_sample_dirs * self.parameters.door_outside_offset)
+        outside_offsets[:, 1] = offset(-sizes[:, 1] / 2)
+
+        inside_offsets = np.zeros((len(doors), 3))
+        inside_offsets[rows, door_dirs] = offset(inside_sample_dirs * self.parameters.door_inside_offset)
+        inside_offsets[:, 1] = offset(-room_heights / 2)
+
+        return centroids + outside_offsets, centroids + inside_offsets
     
-            if path_found:
-                interpolated_path = self.linear_interpolation(path.points)
-                interpolated_path = self.linear_interpolation(interpolated_path)
-                return interpolated_path, start_point, target_point  
-        
-        return [], None, None  
-
-    # Given a path between two rooms, checks if the path passes through any other room
-    def is_adjacent(self, source, target, path):
-        rooms_to_check = [room for room in self.rooms if room not in [source, target]]
-        for point in path:
-            for room in rooms_to_check:
-                if (room.contains_point(point) and not(source.contains_point(point) or target.contains_point(point))):
-                    return False
-        return True
+    # Returns the point used for pathfinding in the given room snapped to the given navmesh island and whether it lies within the room
+    # Results are cached per (room, island) as each room anchor is needed for every other room in the scene
+    def get_room_anchor(self, room_index, island_index, pathfinder:Pathfinder):
+        key = (room_index, island_index)
+        if key not in self.room_anchors:
+            room = self.rooms[room_index]
+            snapped_point = pathfinder.snap_point(room.centroid - np.array([0,room.dims[1]/2,0]), island_index)
+            self.room_anchors[key] = (snapped_point, room.contains_point(snapped_point, self.parameters.room_top_slack, self.parameters.room_bottom_slack))
+            self.profiler.count("contains_point")
+        return self.room_anchors[key]
+
+    # Computes the path between the snapped anchors of each candidate pair of rooms (i < j) on every navmesh island where both anchors lie
+    # within their rooms, keyed by (i, j, island). Paths are empty where none exists
+    def compute_pair_paths(self, pathfinder:Pathfinder, pool:PathfindingPool=None):
+        keys, queries = [], []
+        for i in range(len(self.rooms)):
+            for j in range(i + 1, len(self.rooms)):
+                if not self.candidate_pairs[i, j]:
+                    continue
+                for k in range(pathfinder.num_islands):
+                    start_point, start_on_island = self.get_room_anchor(i, k, pathfinder)
+                    target_point, target_on_island = self.get_room_anchor(j, k, pathfinder)
+                    if start_on_island and target_on_island:
+                        keys.append((i, j, k))
+                        queries.append((start_point, target_point))
+
+        pair_paths = {}
+        for key, path in zip(keys, self.find_paths(queries, pathfinder, pool)):
+            pair_paths[key] = self.densify_path(path, 2) if len(path) > 0 else np.zeros((0, 3), dtype=np.float32)
+        return pair_paths
+
+    # Answers the (start, end) find_path queries in order, the queries that are not cached are run in parallel across the workers of the
+    # pool if one is given. Each pool worker loads the same navmesh so the paths are identical to serial execution
+    def find_paths(self, queries, pathfinder:CachedPathfinder, pool:PathfindingPool=None) -> list:
+        if pool is not None:
+            missing = pathfinder.missing_paths(queries)
+            self.profiler.count("pooled_find_path", len(missing))
+            pathfinder.store_paths(missing, pool.find_paths(missing))
+        return [pathfinder.find_path(start, end) for start, end in queries]
+
+    # Converts a pathfinder path to an (N, 3) float32 array and densifies it, either with the given number of midpoint insertion passes
+    # or by resampling at path_spacing when it is set
+    def densify_path(self, path, passes:int):
+        path = np.asarray(path, dtype=np.float32).reshape(-1, 3)
+        if self.path_spacing is not None:
+            return self.resample_path(path, self.path_spacing, self.max_path_points)
+        for _ in range(passes):
+            path = self.linear_interpolation(path)
+        return path
+
+    # Given the room membership mask of a path between two rooms (see RoomBounds.contains), checks if the path passes through any other room
+    def is_adjacent(self, source_index, target_index, room_mask):
+        in_endpoints = room_mask[:, source_index] | room_mask[:, target_index]
+        other_rooms = np.ones(room_mask.shape[1], dtype=bool)
+        other_rooms[[source_index, target_index]] = False
+        in_other_room = np.any(room_mask[:, other_rooms], axis=1)
+        return not np.any(in_other_room & ~in_endpoints)
     
-    # Given a path between two rooms, checks if the path passes through a room that is already connected to the source room
-    def passes_through_adjacent_room(self, source_index, target_index, path):
+    # Given the room membership mask of a path between two rooms, checks if the path passes through a room that is already connected to the source room
+    def passes_through_adjacent_room(self, source_index, target_index, room_mask):
+        rooms_visited = np.any(room_mask, axis=0)
         for (i, j) in self.connections:
             if i == source_index and j != target_index:
-                for point in path:
-                    if self.rooms[j].contains_point(point):
-                        return True, (i,j)
+                if rooms_visited[j]:
+                    return True, (i,j)
             elif j == source_index and i != target_index:
-                for point in path:
-                    if self.rooms[i].contains_point(point):
-                        return True, (i, j)            
+                if rooms_visited[i]:
+                    return True, (i, j)            
         return False, None
     
     # Increases the resolution of the path by adding a point halfway between each pair of points
     def linear_interpolation(self, points):
-        interpolated_points = []
-        for i in range(len(points) - 1):
-            p0 = points[i]
-            p1 = points[i + 1]
-            interpolated_p = (p0 + p1) / 2
-            interpolated_points.append(p0)
-            interpolated_points.append(interpolated_p)
-        interpolated_points.append(points[-1])
-        return interpolated_points  
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        interpolated_points = np.empty((max(2 * len(points) - 1, 0), 3), dtype=np.float32)
+        interpolated_points[0::2] = points
+        interpolated_points[1::2] = (points[:-1] + points[1:]) / 2
+        return interpolated_points
+
+    # Resamples the path at evenly spaced distances along its length, at most spacing apart, keeping both end points
+    # The number of points is capped at max_points (if given) so long paths are sampled more coarsely
+    def resample_path(self, path, spacing:float, max_points:int=None):
+        path = np.asarray(path, dtype=np.float32).reshape(-1, 3)
+        if len(path) < 2:
+            return path
+        distances = np.r_[0.0, np.cumsum(np.linalg.norm(np.diff(path.astype(np.float64), axis=0), axis=1))]
+        num_points = int(np.ceil(distances[-1] / spacing)) + 1
+        if max_points is not None:
+            num_points = min(num_points, max_points)
+        samples = np.linspace(0.0, distances[-1], max(num_points, 2))
+        return np.column_stack([np.interp(samples, distances, path[:, axis]) for axis in range(3)]).astype(np.float32)
     
     def calculate_path_length(self, path):
-        length = 0
-        for i in range(len(path) - 1):
-            length += np.linalg.norm(path[i+1] - path[i])
-        return length
+        return float(np.linalg.norm(np.diff(np.asarray(path, dtype=np.float64), axis=0), axis=1).sum())
     
     # Saves room data and connections to a dictionary
     def to_dict(self):
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import scipy.sparse as sp
+from functools import cached_property
+from PackedDataset import PACKED_DATASET_PATH, PackedDataset, stale_release_files
+
+# Query API over the released scene graphs
+# Rooms of all scenes share one global index (see PackedDataset) and the corpus is held as a block-diagonal sparse adjacency matrix,
+# so every query is a handful of sparse matrix products rather than a walk over per-scene dicts
+# Multi-function labels such as "kitchen/living room" count as each of their parts in label queries
+class SceneGraphDataset:
+    # Raises a ValueError if the packed dataset does not match the release files in release_dir (pass release_dir=None to skip the
+    # check), it is never rewritten here: rebuild it with convert_label_data_release_format or PackedDataset.write_packed_dataset
+    def __init__(self, path:str=PACKED_DATASET_PATH, release_dir:str='../data/release_data'):
+        if release_dir is not None and os.path.isdir(release_dir):
+            stale = stale_release_files(release_dir, path)
+            if stale:
+                raise ValueError(f"{path} is out of date with {release_dir} ({len(stale)} release files changed, e.g. {stale[0]}), "
+                                 f"rebuild it with PackedDataset.write_packed_dataset")
+
+        self.packed = PackedDataset(path)
+        self.scene_names = self.packed.scene_names
+        self.labels = self.packed.labels
+        self.label_ids = self.packed.label_ids
+        self.centroids = self.packed.centroids
+        self.dims = self.packed.dims
+        self.scene_offsets = self.packed.scene_offsets
+        self.scene_adjacency_cache = {}
+
+    @property
+    def num_rooms(self) -> int:
+        return self.packed.num_rooms
+
+    @property
+    def num_scenes(self) -> int:
+        return self.packed.num_scenes
+
+    # Scene index of every room
+    @cached_property
+    def room_scenes(self) -> np.ndarray:
+        return np.repeat(np.arange(self.num_scenes), np.diff(self.scene_offsets))
+
+    # Symmetric binary (num_rooms, num_rooms) adjacency matrix of the whole corpus, block diagonal by scene
+    @cached_property
+    def adjacency(self) -> sp.csr_matrix:
+        data = np.ones(len(self.packed.edge_indices), dtype=np.int32)
+        directed = sp.csr_matrix((data, self.packed.edge_indices, self.packed.edge_ptr), shape=(self.num_rooms, self.num_rooms))
+        adjacency = ((directed + directed.T) > 0).astype(np.int32)
+        adjacency.setdiag(0)
+        adjacency.eliminate_zeros()
+        return adjacency.tocsr()
+
+    # Adjacency matrix of a single scene (scene name or index), indexed by scene-local room index
+    def scene_adjacency(self, scene) -> sp.csr_matrix:
+        s = self.packed.scene_index(scene)
+        if s not in self.scene_adjacency_cache:
+            start, end = self.scene_offsets[s], self.scene_offsets[s + 1]
+            self.scene_adjacency_cache[s] = self.adjacency[start:end, start:end]
+        return self.scene_adjacency_cache[s]
+
+    # Individual room functions, with multi-function labels split on "/"
+    @cached_property
+    def base_labels(self):
+        return sorted(set(part for label in self.labels for part in label.split('/')))
+
+    # Sparse (num_rooms, num_base_labels) membership matrix, a room has a 1 for every function in its label
+    @cached_property
+    def label_membership(self) -> sp.csr_matrix:
+        base_lookup = {label: i for i, label in enumerate(self.base_labels)}
+        label_parts = [[base_lookup[part] for part in label.split('/')] for label in self.labels]
+        parts_per_label = np.array([len(parts) for parts in label_parts], dtype=np.int64)
+
+        # Expand each room's label id into its parts in one pass
+        labelled = np.flatnonzero(self.label_ids >= 0)
+        room_label_ids = self.label_ids[labelled]
+        flat_parts = np.array([part for parts in label_parts for part in parts], dtype=np.int64)
+        part_starts = np.concatenate([[0], np.cumsum(parts_per_label)])
+        counts = parts_per_label[room_label_ids]
+        rows = np.repeat(labelled, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cols = flat_parts[np.repeat(part_starts[room_label_ids], counts) + offsets]
+        data = np.ones(len(rows), dtype=np.int32)
+        return sp.csr_matrix((data, (rows, cols)), shape=(self.num_rooms, len(self.base_labels)))
+
+    def base_label_id(self, label:str) -> int:
+        return self.base_labels.index(label)
+
+    # Global indices of the rooms with the given function
+    def rooms_with_label(self, label:str) -> np.ndarray:
+        return self.label_membership[:, self.base_label_id(label)].nonzero()[0]
+
+    # Returns (rooms, neighbours) arrays of global room indices, one entry per connection from a room with the given function
+    def neighbours_of_label(self, label:str):
+        rooms = self.rooms_with_label(label)
+        neighbours = self.adjacency[rooms].tocoo()
+        return rooms[neighbours.row], neighbours.col
+
+    # Counts the functions of the rooms connected to rooms with the given function, returned as {function: count}
+    def neighbour_label_counts(self, label:str):
+        mask = np.zeros(self.num_rooms, dtype=np.int32)
+        mask[self.rooms_with_label(label)] = 1
+        counts = self.label_membership.T @ (self.adjacency @ mask)
+        return {base_label: int(count) for base_label, count in zip(self.base_labels, counts) if count > 0}
+
+    # Returns a sparse boolean (len(rooms), num_rooms) matrix whose row i marks every room reachable from rooms[i] in at most k hops
+    # Rooms of different scenes are never reachable from one another as the adjacency matrix is block diagonal
+    def k_hop_reachable(self, rooms, k:int) -> sp.csr_matrix:
+        rooms = np.atleast_1d(np.asarray(rooms, dtype=np.int64))
+        reached = sp.csr_matrix((np.ones(len(rooms), dtype=bool), (np.arange(len(rooms)), rooms)), shape=(len(rooms), self.num_rooms))
+        frontier = reached
+        for _ in range(k):
+            frontier = (frontier @ self.adjacency) > 0
+            frontier = frontier > reached
+            if frontier.nnz == 0:
+                break
+            reached = reached + frontier
+        return reached.tocsr()
+
+    # Returns a (num_base_labels, num_base_labels) matrix counting, over the whole corpus, the connected room pairs with each pair of functions
+    # A connection between rooms with the same function is counted once on the diagonal
+    @cached_property
+    def label_co_adjacency(self) -> np.ndarray:
+        upper = sp.triu(self.adjacency, k=1).tocsr()
+        pair_counts = np.asarray((self.label_membership.T @ upper @ self.label_membership).todense())
+        co_adjacency = pair_counts + pair_counts.T
+        np.fill_diagonal(co_adjacency, np.diag(pair_counts))
+        return co_adjacency
+
+    @cached_property
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.adjacency.indptr)
+
+    # Returns a (num_scenes, max_degree + 1) matrix where row s is the degree histogram of scene s
+    # Summing over axis 0 gives the corpus-wide histogram
+    @cached_property
+    def degree_histograms(self) -> np.ndarray:
+        histograms = np.zeros((self.num_scenes, self.degrees.max() + 1), dtype=np.int64)
+        np.add.at(histograms, (self.room_scenes, self.degrees), 1)
+        return histograms
@@ -0,0 +1,96 @@
+import os
+import json
+import numpy as np
+from SceneGraph import SceneGraph
+from SceneRoom import SceneRoom
+from ObjectTable import ObjectTable
+from RoomBounds import RoomBounds
+from NavmeshIslands import NavmeshIslands
+from GraphParameters import GraphParameters
+
+SNAPSHOT_DIR = '../data/snapshots'
+SNAPSHOT_VERSION = 1
+
+
+# Concatenates a list of (N, 3) point arrays, returns the points and the (len + 1,) offsets of each array within them
+def pack_points(arrays):
+    arrays = [np.asarray(points, dtype=np.float32).reshape(-1, 3) for points in arrays]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(points) for points in arrays])
+    points = np.concatenate(arrays) if arrays else np.zeros((0, 3), dtype=np.float32)
+    return points, offsets
+
+def unpack_points(points, offsets):
+    return [points[offsets[k]:offsets[k + 1]] for k in range(len(offsets) - 1)]
+
+
+# Saves the full state of a constructed scene graph (object table, rooms, connection paths, snapped room and door points and the
+# navmesh island vertices extracted so far) as a single uncompressed .npz, so the visualiser can be reopened without habitat-sim
+# Islands that were never extracted are not stored, call scene_graph.navmesh_islands.materialize() first if they are needed
+def save_snapshot(scene_graph:SceneGraph, path:str):
+    if scene_graph.objects is None:
+        raise ValueError("The scene graph has not been constructed")
+    objects = scene_graph.objects
+    connection_keys = list(scene_graph.connections.keys())
+    connection_points, connection_offsets = pack_points([scene_graph.connections[key] for key in connection_keys])
+    snapped_keys = list(scene_graph.snapped_points.keys())
+    island_indices = sorted(scene_graph.navmesh_islands.vertices.keys())
+    island_vertices, island_offsets = pack_points([scene_graph.navmesh_islands.vertices[i] for i in island_indices])
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path,
+             version=np.array(SNAPSHOT_VERSION),
+             parameters=np.array(json.dumps(scene_graph.parameters.to_dict())),
+             object_centroids=objects.centroids,
+             object_sizes=objects.sizes,
+             object_category_ids=objects.category_ids,
+             object_room_ids=objects.room_ids,
+             categories=np.array(json.dumps(objects.categories)),
+             room_slices=np.array([[room.object_slice.start, room.object_slice.stop] for room in scene_graph.rooms], dtype=np.int64).reshape(-1, 2),
+             room_labels=np.array(json.dumps([room.label for room in scene_graph.rooms])),
+             connection_keys=np.array(connection_keys, dtype=np.int64).reshape(-1, 2),
+             connection_points=connection_points,
+             connection_offsets=connection_offsets,
+             snapped_keys=np.array(snapped_keys, dtype=np.int64).reshape(-1, 2),
+             snapped_points=np.array([scene_graph.snapped_points[key] for key in snapped_keys], dtype=np.float32).reshape(-1, 3),
+             door_islands=np.array([island for island, _ in scene_graph.door_snapped_points], dtype=np.int64),
+             door_points=np.array([point for _, point in scene_graph.door_snapped_points], dtype=np.float32).reshape(-1, 3),
+             num_islands=np.array(len(scene_graph.navmesh_islands)),
+             island_indices=np.array(island_indices, dtype=np.int64),
+             island_vertices=island_vertices,
+             island_offsets=island_offsets)
+    os.replace(tmp_path, path)
+
+# Rebuilds a scene graph from a snapshot written by save_snapshot, the result has no pathfinder and cannot be reconstructed or
+# updated with new parameters but can be drawn by SceneRenderer and saved with to_dict
+def load_snapshot(path:str) -> SceneGraph:
+    data = np.load(path)
+    if int(data['version']) != SNAPSHOT_VERSION:
+        raise ValueError(f"Scene graph snapshot {path} has version {int(data['version'])}, expected {SNAPSHOT_VERSION}")
+
+    # Snapshots written before the parameters were stored were built with the defaults
+    parameters = GraphParameters(**json.loads(str(data['parameters']))) if 'parameters' in data else GraphParameters()
+    scene_graph = SceneGraph(parameters=parameters)
+    scene_graph.objects = ObjectTable(data['object_centroids'], data['object_sizes'], data['object_category_ids'],
+                                      data['object_room_ids'], json.loads(str(data['categories'])))
+    scene_graph.rooms = [SceneRoom(scene_graph.objects, start, stop) for start, stop in data['room_slices']]
+    for room, label in zip(scene_graph.rooms, json.loads(str(data['room_labels']))):
+        room.label = label
+    if scene_graph.rooms:
+        scene_graph.room_bounds = RoomBounds(scene_graph.rooms, parameters.room_top_slack, parameters.room_bottom_slack)
+
+    paths = unpack_points(data['connection_points'], data['connection_offsets'])
+    scene_graph.connections = {(int(i), int(j)): path for (i, j), path in zip(data['connection_keys'], paths)}
+    scene_graph.sorted_connections = dict(sorted(scene_graph.connections.items()))
+    scene_graph.snapped_points = {(int(i), int(k)): point for (i, k), point in zip(data['snapped_keys'], data['snapped_points'])}
+    scene_graph.door_snapped_points = [[int(island), point] for island, point in zip(data['door_islands'], data['door_points'])]
+
+    scene_graph.navmesh_islands = NavmeshIslands()
+    scene_graph.navmesh_islands.num_islands = int(data['num_islands'])
+    island_vertices = unpack_points(data['island_vertices'], data['island_offsets'])
+    scene_graph.navmesh_islands.vertices = {int(i): vertices for i, vertices in zip(data['island_indices'], island_vertices)}
+    return scene_graph
+
+def scene_snapshot_path(scene_name:str, snapshot_dir:str=SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, scene_name + '.npz')
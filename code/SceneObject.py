@@ -1,27 +1,30 @@
 import numpy as np
 
+# View of one row of a scene's ObjectTable, the bounding box corners are only computed when requested
 class SceneObject:
-    def __init__(self, x):
-        self.label = x.category.name()
-        self.centroid = x.aabb.center
-        self.dims = x.aabb.sizes
-        self.world_corners = self.get_corners(self.centroid - self.dims/2, self.centroid + self.dims/2)
- 
-    def get_corners(self, min, max) -> np.ndarray: 
-        corners = np.array([
-            [min[0], min[1], min[2]],
-            [max[0], min[1], min[2]],
-            [max[0], min[1], max[2]],
-            [min[0], min[1], max[2]],
-            [min[0], max[1], min[2]],
-            [max[0], max[1], min[2]],
-            [max[0], max[1], max[2]],
-            [min[0], max[1], max[2]]])
-        return corners
+    def __init__(self, table, index:int):
+        self.table = table
+        self.index = index
+
+    @property
+    def label(self) -> str:
+        return self.table.label(self.index)
+
+    @property
+    def centroid(self) -> np.ndarray:
+        return self.table.centroids[self.index]
+
+    @property
+    def dims(self) -> np.ndarray:
+        return self.table.sizes[self.index]
+
+    @property
+    def world_corners(self) -> np.ndarray:
+        return self.table.corners(self.index)
     
     def to_dict(self):
         return {
             "label": self.label,
             "centroid": {"x": self.centroid.tolist()[0], "y": self.centroid.tolist()[1], "z": self.centroid.tolist()[2]},
             "dims": {"x": self.dims.tolist()[0], "y": self.dims.tolist()[1], "z": self.dims.tolist()[2]},
-        }
\ No newline at end of file
+        }
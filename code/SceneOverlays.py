@@ -0,0 +1,127 @@
+import colorsys
+import numpy as np
+import OverlayGeometry as og
+
+
+# Generates a list of num_colours maximally diiferent colours
+def generate_colour_map(num_colours):
+    HSV_tuples = [(x * 1.0 / num_colours, 1.0, 1.0) for x in range(num_colours)]
+    RGB_tuples = list(map(lambda x: colorsys.hsv_to_rgb(*x), HSV_tuples))
+    return RGB_tuples
+
+
+# Builds the overlay layers of a scene graph (see OverlayGeometry) without any dependency on a display
+# Each method returns a list of merged layers, SceneRenderer adds them to its window and export_overlays writes them to a file
+# Rooms are coloured by room index and door points by navmesh island, as in the visualiser
+class SceneOverlays:
+    def __init__(self, scene):
+        self.scene = scene
+        self.colours = generate_colour_map(len(scene.rooms))
+        self.nav_colours = generate_colour_map(len(scene.navmesh_islands))
+
+    # Colour of the room that each object in the scene's ObjectTable belongs to
+    def object_colours(self):
+        return np.asarray(self.colours).reshape(-1, 3)[self.scene.objects.room_ids]
+
+    # Boxes at the corners of the bounding boxes to make them more visible
+    # corners is an (8, 3) array for a single box or (N, 8, 3) for N boxes, with one colour or a colour per box
+    def bb_corners(self, corners, colour=[0, 0, 0]):
+        corners = np.asarray(corners).reshape(-1, 8, 3)
+        colours = np.repeat(og.instance_colours(colour, len(corners)), 8, axis=0)
+        return [og.boxes(corners.reshape(-1, 3), 0.25, colours)]
+
+    # Centroids, bounding boxes and bounding box corners of each room
+    def rooms(self):
+        rooms = self.scene.rooms
+        if not rooms:
+            return []
+        corners = np.array([room.world_corners for room in rooms])
+        return [og.boxes([room.centroid for room in rooms], 0.5, self.colours),
+                og.bounding_boxes(corners, self.colours)] + self.bb_corners(corners, self.colours)
+
+    def object_centroids(self):
+        objects = self.scene.objects
+        if len(objects) == 0:
+            return []
+        return [og.boxes(objects.centroids, 0.15, self.object_colours())]
+
+    # Lines between the centroids of each object and the room they are in
+    def object_room_lines(self):
+        objects = self.scene.objects
+        if len(objects) == 0:
+            return []
+        room_centroids = np.array([room.centroid for room in self.scene.rooms])[objects.room_ids]
+        return [og.segments(objects.centroids, room_centroids, self.object_colours())]
+
+    def object_bbs(self):
+        objects = self.scene.objects
+        if len(objects) == 0:
+            return []
+        return [og.bounding_boxes(objects.corners(), self.object_colours())]
+
+    # The connections are symmetric, each path is only returned once, with the colour of its source room
+    def unique_paths(self):
+        paths_drawn = set()
+        paths, colours = [], []
+        for (source_room_index, target_room_index), path in self.scene.connections.items():
+            if (source_room_index, target_room_index) not in paths_drawn and (target_room_index, source_room_index) not in paths_drawn:
+                paths_drawn.add((source_room_index, target_room_index))
+                paths.append(path)
+                colours.append(self.colours[source_room_index])
+        return paths, colours
+
+    # Points of the paths computed between adjacent rooms
+    def adjacent_paths(self):
+        paths, colours = self.unique_paths()
+        if sum(len(path) for path in paths) == 0:
+            return []
+        colours = np.repeat(np.asarray(colours).reshape(-1, 3), [len(path) for path in paths], axis=0)
+        return [og.spheres(np.concatenate([np.asarray(path).reshape(-1, 3) for path in paths]), 0.05, colours)]
+
+    # Paths computed between adjacent rooms as polylines
+    def adjacent_path_lines(self):
+        paths, colours = self.unique_paths()
+        if sum(len(path) for path in paths) == 0:
+            return []
+        return [og.polylines(paths, colours)]
+
+    # Start/target point used for pathfinding in each room
+    def room_nav_points(self):
+        if not self.scene.snapped_points:
+            return []
+        colours = [self.colours[room_index] for (room_index, _) in self.scene.snapped_points]
+        return [og.spheres(list(self.scene.snapped_points.values()), 0.1, colours)]
+
+    # Start/target points on both sides of each door used for pathfinding through closed doors
+    # The colour of the point indicates the navmesh island that the point is snapped to
+    def door_nav_points(self):
+        if not self.scene.door_snapped_points:
+            return []
+        colours = [self.nav_colours[island_index] for [island_index, _] in self.scene.door_snapped_points]
+        return [og.spheres([snapped_point for [_, snapped_point] in self.scene.door_snapped_points], 0.1, colours)]
+
+    # Line between the centroids of each pair of connected rooms
+    def connected_rooms(self):
+        if not self.scene.connections:
+            return []
+        sources = [self.scene.rooms[source].centroid for source, _ in self.scene.connections]
+        targets = [self.scene.rooms[target].centroid for _, target in self.scene.connections]
+        return [og.segments(sources, targets, [0, 1, 0])]
+
+    # Points of each navmesh island with lines between successive points, coloured by island
+    def navmesh(self):
+        islands = list(self.scene.navmesh_islands)
+        if sum(len(island) for island in islands) == 0:
+            return []
+        colours = np.repeat(np.asarray(self.nav_colours).reshape(-1, 3), [len(island) for island in islands], axis=0)
+        return [og.spheres(np.concatenate(islands), 0.05, colours), og.polylines(islands, [[0.5, 0.5, 0.5]] * len(islands))]
+
+    # Bounding box around all instances of the given category, coloured by the room that the object is in
+    def object_category(self, category):
+        objects = self.scene.objects
+        selected = np.flatnonzero(objects.category_ids == objects.category_id(category))
+        if len(selected) == 0:
+            return []
+        corners = objects.corners(selected)
+        colours = self.object_colours()[selected]
+        return [og.bounding_boxes(corners, colours)] + self.bb_corners(corners, colours)
@@ -2,15 +2,26 @@ import numpy as np
 from SceneObject import SceneObject
 
 
+# A room holds the slice of rows of the scene's ObjectTable that belong to it
 class SceneRoom:
-    def __init__(self, x):
+    def __init__(self, table, start:int, stop:int):
         self.label = None
-        self.objects = x
+        self.set_objects(table, start, stop)
+
+    # Points the room at rows [start, stop) of the table and recomputes its bounding box from their centroids
+    def set_objects(self, table, start:int, stop:int):
+        self.table = table
+        self.object_slice = slice(int(start), int(stop))
         min, max = self.get_extents()
         self.centroid = (min + max) / 2
         self.dims = max - min
         self.world_corners = self.get_corners(min, max)
 
+    # SceneObject views of the room's objects
+    @property
+    def objects(self):
+        return [SceneObject(self.table, k) for k in range(self.object_slice.start, self.object_slice.stop)]
+
     def get_corners(self, min, max) -> np.ndarray:
         corners = np.array([
             [min[0], min[1], min[2]],
@@ -24,21 +35,22 @@ class SceneRoom:
         return corners
     
     def get_extents(self):
-        obj_centroids = np.vstack(np.array([obj.centroid for obj in self.objects]))
+        obj_centroids = self.table.centroids[self.object_slice]
         min = np.min(obj_centroids, axis=0)
         max = np.max(obj_centroids, axis=0)
         return min, max
     
-    def contains_point(self, point: np.ndarray) -> bool:
+    # A point is in the room if it lies within its xz extent, at most top_slack above its centroid and at most bottom_slack below centroid - dims
+    def contains_point(self, point: np.ndarray, top_slack:float=1.0, bottom_slack:float=0.5) -> bool:
         x_min, z_min = self.world_corners[:, [0, 2]].min(axis=0)
         x_max, z_max = self.world_corners[:, [0, 2]].max(axis=0)
         x, y, z = point[0], point[1], point[2]
-        return x_min <= x <= x_max and z_min <= z <= z_max and y <= (self.centroid[1]+1) and y >= (self.centroid[1] - self.dims[1] - 0.5)
+        return x_min <= x <= x_max and z_min <= z <= z_max and y <= (self.centroid[1]+top_slack) and y >= (self.centroid[1] - self.dims[1] - bottom_slack)
 
     def to_dict(self):
         return {
             "label": self.label,
             "centroid": {"x": self.centroid.tolist()[0], "y": self.centroid.tolist()[1], "z": self.centroid.tolist()[2]},
             "dims": {"x": self.dims.tolist()[0], "y": self.dims.tolist()[1], "z": self.dims.tolist()[2]},
-            "objects": [obj.label for obj in self.objects]
+            "objects": self.table.labels(self.object_slice)
         }
\ No newline at end of file
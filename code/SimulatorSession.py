@@ -0,0 +1,74 @@
+import gc
+import os
+import time
+from utils import habsim_simulator_configuration, habsim_agent_configuration, load_scene_navmesh
+
+
+# Resident set size of the current process in MB
+def resident_memory_mb() -> float:
+    with open('/proc/self/statm', 'r') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+# A single habitat-sim instance that is kept alive across scenes
+# The first scene creates the simulator, every later scene is swapped in with Simulator.reconfigure, which keeps the renderer
+# and GL context and reuses the agent configuration instead of paying for a full construction per scene
+# Use it as a context manager so the simulator is closed when the batch is done:
+#     with SimulatorSession(scene_config) as session:
+#         for scene_id in scene_ids:
+#             sim = session.load_scene(scene_id)
+class SimulatorSession:
+    def __init__(self, scene_config:str, sensors:bool=False, use_navmesh_cache:bool=True):
+        self.scene_config = scene_config
+        self.use_navmesh_cache = use_navmesh_cache
+        self.agent_cfg = habsim_agent_configuration(sensors)
+        self.sim = None
+        self.scene_id = None
+        self.scenes_loaded = 0
+        # Wall time and resident memory after loading each scene, as (scene_id, seconds, rss_mb)
+        self.load_history = []
+
+    # Loads a scene into the simulator (and its navmesh) and returns the simulator
+    # The returned simulator is owned by the session, do not close it. Objects taken from the previous scene (semantic scene,
+    # pathfinder) are invalid once the next scene is loaded
+    def load_scene(self, scene_id:str) -> "habitat_sim.Simulator":
+        import habitat_sim
+
+        start = time.perf_counter()
+        # A new Configuration object is needed each time, reconfigure does nothing if it compares equal to the current one
+        cfg = habitat_sim.Configuration(habsim_simulator_configuration(self.scene_config, scene_id), [self.agent_cfg])
+        reconfigure = self.sim is not None
+        if not reconfigure:
+            self.sim = habitat_sim.Simulator(cfg)
+        self.scene_id = None
+        # A scene that fails to load leaves the simulator in an unknown state, the next scene starts from a new one
+        try:
+            if reconfigure:
+                self.sim.reconfigure(cfg)
+            load_scene_navmesh(self.sim, scene_id, self.use_navmesh_cache)
+        except Exception:
+            self.close()
+            raise
+        self.scene_id = scene_id
+
+        self.scenes_loaded += 1
+        self.load_history.append((scene_id, time.perf_counter() - start, resident_memory_mb()))
+        return self.sim
+
+    # Wall time and resident memory of the last scene load
+    def last_load(self):
+        return self.load_history[-1] if self.load_history else (None, 0.0, 0.0)
+
+    def close(self):
+        if self.sim is not None:
+            self.sim.close()
+            self.sim = None
+        self.scene_id = None
+        gc.collect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,98 @@
+import numpy as np
+from GridPathfinder import GridPathfinder
+
+# Synthetic stand-ins for habitat-sim semantic scenes, with the regions/objects/aabb/category structure SceneGraph.load_objects reads
+# Rooms are laid out on a grid on each floor. Neighbouring rooms on the same navmesh island are joined by open doorways in the navmesh,
+# rooms on different islands are separated by closed doors, marked only by a "door frame" object as in HM3D
+
+OBJECT_CATEGORIES = ["chair", "table", "bed", "sofa", "cabinet", "lamp", "shelf", "plant", "picture", "sink"]
+
+
+class SyntheticCategory:
+    def __init__(self, name:str):
+        self.category_name = name
+
+    def name(self) -> str:
+        return self.category_name
+
+class SyntheticAABB:
+    def __init__(self, center, sizes):
+        self.center = np.asarray(center, dtype=np.float32)
+        self.sizes = np.asarray(sizes, dtype=np.float32)
+
+class SyntheticObject:
+    def __init__(self, center, sizes, category:str):
+        self.aabb = SyntheticAABB(center, sizes)
+        self.category = SyntheticCategory(category)
+
+class SyntheticRegion:
+    def __init__(self, objects):
+        self.objects = objects
+
+class SyntheticSemanticScene:
+    def __init__(self, regions):
+        self.regions = regions
+
+
+# Generates a synthetic semantic scene and a matching GridPathfinder navmesh
+# num_rooms rooms are split evenly across num_floors floors (floors are not connected to each other)
+# Each floor's rooms are split into num_islands bands of columns, bands are separated by closed doors
+# door_frames adds a "door frame" object to every open doorway as well as to the closed doors
+def generate_synthetic_scene(num_rooms:int, objects_per_room:int=10, num_floors:int=1, num_islands:int=1, door_frames:bool=True,
+                             room_size:float=4.0, floor_height:float=3.0, cell_size:float=0.1, seed:int=0):
+    rng = np.random.default_rng(seed)
+    wall = 0.1
+    door_width = 1.0
+
+    # Region 0 is the null region found in HM3D scenes
+    regions = [SyntheticRegion([])]
+    floor_rectangles = []
+
+    rooms_per_floor = int(np.ceil(num_rooms / num_floors))
+    columns = int(np.ceil(np.sqrt(rooms_per_floor)))
+    rows = int(np.ceil(rooms_per_floor / columns))
+    island_of_column = np.minimum(np.arange(columns) * num_islands // columns, num_islands - 1)
+
+    room_count = 0
+    for floor in range(num_floors):
+        y = floor * floor_height
+        floor_rooms = min(rooms_per_floor, num_rooms - room_count)
+        cells = [(column, row) for row in range(rows) for column in range(columns)][:floor_rooms]
+        occupied = set(cells)
+
+        for column, row in cells:
+            x_min, z_min = column * room_size, row * room_size
+            floor_rectangles.append((x_min + wall, z_min + wall, x_min + room_size - wall, z_min + room_size - wall, y))
+
+            # Objects spread over the room with two at opposite corners so the room's extents cover most of its floor plan
+            centres = np.column_stack([
+                rng.uniform(x_min + 0.5, x_min + room_size - 0.5, objects_per_room),
+                rng.uniform(y + 0.3, y + 2.2, objects_per_room),
+                rng.uniform(z_min + 0.5, z_min + room_size - 0.5, objects_per_room)])
+            centres[:2] = [[x_min + 0.15, y + 0.2, z_min + 0.15], [x_min + room_size - 0.15, y + 2.4, z_min + room_size - 0.15]]
+            objects = [SyntheticObject(centre, rng.uniform(0.2, 1.0, 3), OBJECT_CATEGORIES[rng.integers(len(OBJECT_CATEGORIES))]) for centre in centres]
+
+            # Doorways to the room in the next column (x) and the next row (z)
+            for d_column, d_row in [(1, 0), (0, 1)]:
+                if (column + d_column, row + d_row) not in occupied:
+                    continue
+                same_island = island_of_column[column] == island_of_column[column + d_column]
+                if d_column:
+                    door_centre = (x_min + room_size, y + 1.05, z_min + room_size / 2)
+                    door_dims = (0.1, 2.1, door_width)
+                    gap = (x_min + room_size - 2 * wall, z_min + (room_size - door_width) / 2, x_min + room_size + 2 * wall, z_min + (room_size + door_width) / 2, y)
+                else:
+                    door_centre = (x_min + room_size / 2, y + 1.05, z_min + room_size)
+                    door_dims = (door_width, 2.1, 0.1)
+                    gap = (x_min + (room_size - door_width) / 2, z_min + room_size - 2 * wall, x_min + (room_size + door_width) / 2, z_min + room_size + 2 * wall, y)
+
+                if same_island:
+                    floor_rectangles.append(gap)
+                if door_frames or not same_island:
+                    objects.append(SyntheticObject(door_centre, door_dims, "door frame"))
+
+            regions.append(SyntheticRegion(objects))
+        room_count += floor_rooms
+
+    pathfinder = GridPathfinder.from_floor_plan(floor_rectangles, cell_size=cell_size)
+    return SyntheticSemanticScene(regions), pathfinder
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import queue
+import traceback
+import multiprocessing as mp
+from utils import create_habsim_instance, save_scene_graph_to_yaml, scene_name
+from SimulatorSession import SimulatorSession
+from SceneGraph import SceneGraph
+from Pathfinder import HabitatPathfinder
+from Profiler import PROFILE_DIR, StageProfiler
+from SceneGraphSnapshot import save_snapshot, scene_snapshot_path
+
+MANIFEST_PATH = '../data/batch_manifest.json'
+
+# Parses a scene selection ("all", "7", "0-9" or a comma separated mix such as "1,4,7-9") into a sorted list of scene indices
+def parse_scene_selection(selection:str, num_scenes:int):
+    if selection == "all":
+        return list(range(num_scenes))
+
+    indices = set()
+    for part in selection.split(','):
+        bounds = [bound.strip() for bound in part.split("-")]
+        if len(bounds) > 2 or not all(bound.isdigit() for bound in bounds):
+            raise ValueError(f"Invalid scene selection part \"{part}\", expected an index such as \"7\" or a range such as \"0-9\"")
+        start, end = int(bounds[0]), int(bounds[-1])
+        if start > end:
+            raise ValueError(f"Invalid scene range \"{part}\", the start is after the end")
+        indices.update(range(start, end + 1))
+
+    for index in indices:
+        if index < 0 or index >= num_scenes:
+            raise ValueError(f"Scene index {index} is out of range (0-{num_scenes - 1})")
+    return sorted(indices)
+
+def load_manifest(manifest_path:str):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+# Writes the manifest to a temporary file first so that a crash mid-write never leaves a corrupt manifest behind
+def save_manifest(manifest, manifest_path:str):
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+# Builds the scene graph for a single scene and saves it to a YAML file and a snapshot
+# The snapshot only holds the navmesh islands with store_navmesh=True (they are extracted from the simulator's navmesh for it)
+# With a SimulatorSession the scene is loaded into its simulator, which stays open for the next scene, otherwise a simulator is
+# created for the scene and closed before returning
+# With profile=True a JSON profile of the construction is written to PROFILE_DIR
+def process_scene(scene_config:str, scene_id:str, profile:bool=False, session:SimulatorSession=None, store_navmesh:bool=False):
+    profiler = StageProfiler(enabled=profile)
+    with profiler.stage("create_habsim_instance"):
+        sim = session.load_scene(scene_id) if session is not None else create_habsim_instance(scene_config, scene_id, sensors=False)
+    try:
+        scene_graph = SceneGraph(profiler)
+        scene_graph.construct_graph(sim.semantic_scene, HabitatPathfinder(sim.pathfinder))
+        if store_navmesh:
+            scene_graph.navmesh_islands.materialize()
+        scene_graph.navmesh_islands.release()
+    finally:
+        if session is None:
+            sim.close()
+
+    save_scene_graph_to_yaml(scene_graph.to_dict(), scene_id)
+    save_snapshot(scene_graph, scene_snapshot_path(scene_name(scene_id)))
+    if profile:
+        profiler.save(os.path.join(PROFILE_DIR, scene_name(scene_id) + '.json'), scene=scene_name(scene_id), rooms=len(scene_graph.rooms))
+    info = {"rooms": len(scene_graph.rooms), "connections": len(scene_graph.sorted_connections)}
+    if session is not None:
+        _, load_seconds, rss_mb = session.last_load()
+        info.update({"load_seconds": round(load_seconds, 3), "rss_mb": round(rss_mb, 1)})
+    return info
+
+# Worker process main loop, processes one scene at a time until it receives None
+# Each worker keeps one simulator for all of its scenes and swaps the scene in with reconfigure (see SimulatorSession)
+def worker_loop(scene_config:str, task_queue, result_queue, profile:bool=False, store_navmesh:bool=False):
+    with SimulatorSession(scene_config) as session:
+        while True:
+            scene_id = task_queue.get()
+            if scene_id is None:
+                break
+
+            start = time.time()
+            try:
+                info = process_scene(scene_config, scene_id, profile, session, store_navmesh)
+                result_queue.put((scene_id, "finished", time.time() - start, info))
+            except Exception:
+                result_queue.put((scene_id, "failed", time.time() - start, {"error": traceback.format_exc()}))
+
+# A worker process together with the scene it is currently processing
+class BatchWorker:
+    def __init__(self, ctx, scene_config, result_queue, profile=False, store_navmesh=False):
+        self.task_queue = ctx.Queue()
+        self.process = ctx.Process(target=worker_loop, args=(scene_config, self.task_queue, result_queue, profile, store_navmesh), daemon=True)
+        self.process.start()
+        self.scene_id = None
+        self.start_time = None
+
+    def assign(self, scene_id):
+        self.scene_id = scene_id
+        self.start_time = time.time()
+        self.task_queue.put(scene_id)
+
+    def release(self):
+        self.scene_id = None
+        self.start_time = None
+
+    def stop(self):
+        if self.process.is_alive():
+            self.task_queue.put(None)
+            self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+# Builds the scene graphs for the given scenes across a pool of worker processes (one simulator per worker, reused across its scenes)
+# Progress is recorded in a manifest after every scene so that an interrupted run only reprocesses scenes that did not finish
+def run_batch(scene_config:str, scene_ids, manifest_path:str=MANIFEST_PATH, num_workers:int=1, timeout:float=None, profile:bool=False, store_navmesh:bool=False):
+    manifest = load_manifest(manifest_path)
+    pending = [scene_id for scene_id in scene_ids if manifest.get(scene_name(scene_id), {}).get("status") != "finished"]
+    print(f"{len(scene_ids) - len(pending)} of {len(scene_ids)} scenes already finished, processing {len(pending)}")
+    if not pending:
+        return manifest
+
+    # Workers are forked so that main.py is not re-executed in each child, no simulator exists in the parent at this point
+    ctx = mp.get_context("fork")
+    result_queue = ctx.Queue()
+    workers = [BatchWorker(ctx, scene_config, result_queue, profile, store_navmesh) for _ in range(min(num_workers, len(pending)))]
+
+    def record(scene_id, status, seconds, info):
+        manifest[scene_name(scene_id)] = {"scene_id": scene_id, "status": status, "seconds": round(seconds, 2), **info}
+        save_manifest(manifest, manifest_path)
+        print(f"[{status}] {scene_name(scene_id)} ({seconds:.1f}s)")
+
+    try:
+        while pending or any(worker.scene_id is not None for worker in workers):
+            for worker in workers:
+                if worker.scene_id is None and pending:
+                    worker.assign(pending.pop(0))
+
+            try:
+                scene_id, status, seconds, info = result_queue.get(timeout=1.0)
+                record(scene_id, status, seconds, info)
+                for worker in workers:
+                    if worker.scene_id == scene_id:
+                        worker.release()
+            except queue.Empty:
+                pass
+
+            # Replace workers that have hung or crashed (e.g. a segfault inside habitat-sim)
+            for index, worker in enumerate(workers):
+                if worker.scene_id is None:
+                    continue
+                elapsed = time.time() - worker.start_time
+                if timeout is not None and elapsed > timeout:
+                    worker.process.terminate()
+                    worker.process.join()
+                    record(worker.scene_id, "timed_out", elapsed, {})
+                elif not worker.process.is_alive():
+                    record(worker.scene_id, "failed", elapsed, {"error": f"worker exited with code {worker.process.exitcode}"})
+                else:
+                    continue
+                workers[index] = BatchWorker(ctx, scene_config, result_queue, profile, store_navmesh)
+    finally:
+        for worker in workers:
+            worker.stop()
+
+    statuses = [manifest.get(scene_name(scene_id), {}).get("status") for scene_id in scene_ids]
+    print(f"Finished: {statuses.count('finished')}, failed: {statuses.count('failed')}, timed out: {statuses.count('timed_out')}")
+    return manifest
@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+from SyntheticScene import generate_synthetic_scene
+from SceneGraph import SceneGraph
+from Profiler import StageProfiler
+from PathfindingPool import PathfindingPool
+
+BASELINE_PATH = '../data/benchmark_baseline.json'
+
+# Synthetic scene configurations benchmarked by default, keyed by name
+# Larger scenes are split across floors and navmesh islands so the closed door and island stages are exercised
+DEFAULT_CONFIGS = {
+    "rooms_4": {"num_rooms": 4, "objects_per_room": 10},
+    "rooms_8": {"num_rooms": 8, "objects_per_room": 10, "num_islands": 2},
+    "rooms_16": {"num_rooms": 16, "objects_per_room": 20, "num_floors": 2, "num_islands": 2},
+    "rooms_32": {"num_rooms": 32, "objects_per_room": 20, "num_floors": 2, "num_islands": 2},
+}
+
+
+# Times every SceneGraph stage and to_dict on a synthetic scene, keeping the fastest of the repeats for each
+# With path_workers > 1 the pathfinding runs on a PathfindingPool loaded from a saved copy of the synthetic navmesh
+def benchmark_config(config:dict, repeats:int=3, path_workers:int=1) -> dict:
+    semantic_scene, pathfinder = generate_synthetic_scene(**config)
+    stage_times = {}
+    counts = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = None
+        if path_workers > 1:
+            navmesh_path = tmp_dir + '/navmesh.npz'
+            pathfinder.save(navmesh_path)
+            pool = PathfindingPool(navmesh_path, path_workers)
+
+        for _ in range(repeats):
+            profiler = StageProfiler()
+            scene_graph = SceneGraph(profiler)
+            scene_graph.construct_graph(semantic_scene, pathfinder, pool)
+            with profiler.stage("to_dict"):
+                scene_graph.to_dict()
+
+            for name, seconds in profiler.stage_times.items():
+                stage_times[name] = min(stage_times.get(name, seconds), seconds)
+            counts = profiler.counts
+
+        if pool is not None:
+            pool.close()
+
+    return {
+        "config": config,
+        "rooms": len(scene_graph.rooms),
+        "connections": len(scene_graph.sorted_connections),
+        "stages": {name: round(seconds, 6) for name, seconds in stage_times.items()},
+        "counts": counts,
+    }
+
+def run_benchmarks(configs:dict, repeats:int=3, path_workers:int=1) -> dict:
+    results = {}
+    for name, config in configs.items():
+        results[name] = benchmark_config(config, repeats, path_workers)
+        stages = results[name]["stages"]
+        print(f"{name}: {results[name]['rooms']} rooms, {sum(stages.values()):.3f}s " + ", ".join(f"{stage} {seconds:.4f}s" for stage, seconds in stages.items()))
+    return results
+
+# A stage regresses when it is slower than tolerance x its baseline time and by more than min_seconds (to ignore timer noise on fast stages)
+# Returns a list of regression messages, benchmarks or stages missing from the baseline are not compared
+def find_regressions(results:dict, baseline:dict, tolerance:float=2.0, min_seconds:float=0.02) -> list:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for stage, seconds in result["stages"].items():
+            baseline_seconds = baseline[name]["stages"].get(stage)
+            if baseline_seconds is None:
+                continue
+            if seconds > baseline_seconds * tolerance and seconds - baseline_seconds > min_seconds:
+                regressions.append(f"{name} {stage}: {seconds:.4f}s vs baseline {baseline_seconds:.4f}s ({seconds / max(baseline_seconds, 1e-9):.2f}x)")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the SceneGraph stages on synthetic scenes')
+    parser.add_argument('--configs', type=str, default=None, help='Comma separated subset of the benchmark configurations to run, e.g. "rooms_4,rooms_8"')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of runs of each configuration, the fastest time of each stage is reported')
+    parser.add_argument('--path-workers', type=int, default=1, help='Number of pathfinding worker processes (1 runs the pathfinding serially)')
+    parser.add_argument('--output', type=str, default=None, help='Path of the JSON results file (printed to stdout if not given)')
+    parser.add_argument('--baseline', type=str, default=BASELINE_PATH, help='Path of the stored baseline results')
+    parser.add_argument('--tolerance', type=float, default=2.0, help='Slowdown factor over the baseline that counts as a regression')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline instead of comparing against it')
+    args = parser.parse_args()
+
+    configs = DEFAULT_CONFIGS
+    if args.configs is not None:
+        configs = {name: DEFAULT_CONFIGS[name] for name in args.configs.split(',')}
+
+    results = run_benchmarks(configs, args.repeats, args.path_workers)
+
+    if args.output is None:
+        print(json.dumps(results, indent=4))
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline updated: {args.baseline}")
+        sys.exit()
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one")
+        sys.exit()
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print("Regression: " + regression)
+    if regressions:
+        sys.exit(1)
+    print("No regressions against " + args.baseline)
@@ -0,0 +1,102 @@
+import os
+import gc
+import json
+import time
+import argparse
+import numpy as np
+import multiprocessing as mp
+from utils import create_habsim_instance, scene_name
+from batch import parse_scene_selection
+from SimulatorSession import SimulatorSession, resident_memory_mb
+
+
+# Loads each scene into a simulator created for that scene and closed afterwards, as batch mode did before SimulatorSession
+# Returns [(scene, seconds, rss_mb)]
+def fresh_scene_loads(scene_config:str, scene_ids, use_navmesh_cache:bool=True) -> list:
+    loads = []
+    for scene_id in scene_ids:
+        start = time.perf_counter()
+        sim = create_habsim_instance(scene_config, scene_id, sensors=False, use_navmesh_cache=use_navmesh_cache)
+        seconds = time.perf_counter() - start
+        sim.close()
+        del sim
+        gc.collect()
+        loads.append((scene_name(scene_id), seconds, resident_memory_mb()))
+    return loads
+
+# Loads each scene into one SimulatorSession, returns [(scene, seconds, rss_mb)]
+def session_scene_loads(scene_config:str, scene_ids, use_navmesh_cache:bool=True) -> list:
+    with SimulatorSession(scene_config, use_navmesh_cache=use_navmesh_cache) as session:
+        for scene_id in scene_ids:
+            session.load_scene(scene_id)
+        return [(scene_name(scene_id), seconds, rss_mb) for scene_id, seconds, rss_mb in session.load_history]
+
+# Runs one of the above in a forked process so that each mode starts from the same clean process and GL context
+def run_isolated(function, scene_config:str, scene_ids, use_navmesh_cache:bool=True) -> list:
+    ctx = mp.get_context("fork")
+    with ctx.Pool(1) as pool:
+        return pool.apply(function, (scene_config, scene_ids, use_navmesh_cache))
+
+# Latency of the first and the following scene loads and the growth of the resident memory over the scenes
+# The slope of a least squares line through the RSS after each load (ignoring the first scenes, while the caches fill up) is
+# the memory kept per scene, it should be close to zero for a session that tears down each scene cleanly
+def summarise(loads:list, warmup:int=5) -> dict:
+    seconds = np.array([load[1] for load in loads])
+    rss = np.array([load[2] for load in loads])
+    steady = np.arange(min(warmup, max(len(loads) - 2, 0)), len(loads))
+    slope = float(np.polyfit(steady, rss[steady], 1)[0]) if len(steady) > 1 else 0.0
+    return {
+        "scenes": len(loads),
+        "first_load_seconds": round(float(seconds[0]), 3) if len(loads) > 0 else 0.0,
+        "mean_load_seconds": round(float(seconds[1:].mean()), 3) if len(loads) > 1 else 0.0,
+        "median_load_seconds": round(float(np.median(seconds[1:])), 3) if len(loads) > 1 else 0.0,
+        "total_seconds": round(float(seconds.sum()), 3),
+        "first_rss_mb": round(float(rss[0]), 1) if len(loads) > 0 else 0.0,
+        "last_rss_mb": round(float(rss[-1]), 1) if len(loads) > 0 else 0.0,
+        "max_rss_mb": round(float(rss.max()), 1) if len(loads) > 0 else 0.0,
+        "rss_mb_per_scene": round(slope, 3),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the per-scene startup time and memory of a new simulator per scene with one reconfigured SimulatorSession')
+    parser.add_argument('--data-parent-dir', type=str, required=True, help='The absolute path to the parent directory of the scene_datasets directory')
+    parser.add_argument('--scenes', type=str, default='0-59', help='The scenes to load (indices in HM3DSem_paths.json), e.g. "all", "0-59" or "1,4,7-9"')
+    parser.add_argument('--modes', type=str, default='fresh,session', help='Comma separated subset of the modes "fresh" and "session"')
+    parser.add_argument('--no-navmesh-cache', action='store_true', help='Recompute the navmesh of every scene in both modes instead of loading the cached navmesh')
+    parser.add_argument('--warmup', type=int, default=5, help='Number of initial scenes left out of the memory growth estimate')
+    parser.add_argument('--max-rss-growth', type=float, default=None, help='Exit with a non-zero status if the session keeps more than this many MB per scene')
+    parser.add_argument('--output', type=str, default=None, help='Path of the JSON results file with the load of every scene')
+    args = parser.parse_args()
+
+    with open('../data/HM3DSem_paths.json', 'r') as f:
+        scenes = json.load(f)
+    scene_ids = [scenes[i] for i in parse_scene_selection(args.scenes, len(scenes))]
+    scene_config = args.data_parent_dir + "/scene_datasets/hm3d/hm3d_annotated_basis.scene_dataset_config.json"
+
+    # Both modes load the navmesh the same way. With the cache, an untimed pass first writes any missing navmesh caches so that
+    # neither mode pays for recomputing them and the difference between the modes is only the simulator construction
+    use_navmesh_cache = not args.no_navmesh_cache
+    if use_navmesh_cache:
+        run_isolated(session_scene_loads, scene_config, scene_ids, use_navmesh_cache)
+
+    functions = {"fresh": fresh_scene_loads, "session": session_scene_loads}
+    results = {}
+    for mode in args.modes.split(','):
+        loads = run_isolated(functions[mode], scene_config, scene_ids, use_navmesh_cache)
+        results[mode] = {"summary": summarise(loads, args.warmup), "loads": loads}
+        print(f"{mode}: {json.dumps(results[mode]['summary'])}")
+
+    if "fresh" in results and "session" in results and results["session"]["summary"]["mean_load_seconds"] > 0:
+        print(f"Scene swap speedup over a new simulator: {results['fresh']['summary']['mean_load_seconds'] / results['session']['summary']['mean_load_seconds']:.2f}x")
+
+    if args.output is not None:
+        directory = os.path.dirname(args.output)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.max_rss_growth is not None and "session" in results and results["session"]["summary"]["rss_mb_per_scene"] > args.max_rss_growth:
+        print(f"Session memory grows by {results['session']['summary']['rss_mb_per_scene']:.2f}MB per scene")
+        raise SystemExit(1)
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import yaml
+import argparse
+import numpy as np
+import multiprocessing as mp
+from scipy.optimize import linear_sum_assignment
+from PackedDataset import PackedDataset, PACKED_DATASET_PATH, YamlLoader
+from SceneGraphSnapshot import SNAPSHOT_DIR, load_snapshot
+
+
+# Pairwise 3D IoU of two sets of axis aligned boxes given by their centroids and dims, returns an (A, B) array
+def box_iou(centroids_a, dims_a, centroids_b, dims_b) -> np.ndarray:
+    centroids_a, dims_a = np.asarray(centroids_a, dtype=np.float64).reshape(-1, 3), np.asarray(dims_a, dtype=np.float64).reshape(-1, 3)
+    centroids_b, dims_b = np.asarray(centroids_b, dtype=np.float64).reshape(-1, 3), np.asarray(dims_b, dtype=np.float64).reshape(-1, 3)
+    mins_a, maxs_a = centroids_a - dims_a / 2, centroids_a + dims_a / 2
+    mins_b, maxs_b = centroids_b - dims_b / 2, centroids_b + dims_b / 2
+
+    overlaps = np.clip(np.minimum(maxs_a[:, None, :], maxs_b[None, :, :]) - np.maximum(mins_a[:, None, :], mins_b[None, :, :]), 0, None)
+    intersections = overlaps.prod(axis=2)
+    unions = dims_a.prod(axis=1)[:, None] + dims_b.prod(axis=1)[None, :] - intersections
+    return np.divide(intersections, unions, out=np.zeros_like(intersections), where=unions > 0)
+
+# Optimal one-to-one matching of regenerated rooms (rows) to released rooms (columns) maximising the total IoU
+# Pairs with an IoU of min_iou or less are left unmatched, returns the matched (rows, cols)
+def match_rooms(iou, min_iou:float=0.1):
+    if iou.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    rows, cols = linear_sum_assignment(iou, maximize=True)
+    kept = iou[rows, cols] > min_iou
+    return rows[kept], cols[kept]
+
+# Unordered room pairs of an (N, 2) array of connections, as a set of (min, max) tuples
+def connection_set(connections) -> set:
+    connections = np.sort(np.asarray(connections, dtype=np.int64).reshape(-1, 2), axis=1)
+    return set(map(tuple, connections[connections[:, 0] != connections[:, 1]].tolist()))
+
+# Reads the room boxes and connections (0-based room indices) of a regenerated scene graph, either a SceneGraph snapshot (.npz)
+# or a YAML file in the label_data or release format
+def load_regenerated(path:str):
+    if path.endswith('.npz'):
+        scene_graph = load_snapshot(path)
+        centroids = np.array([room.centroid for room in scene_graph.rooms], dtype=np.float64).reshape(-1, 3)
+        dims = np.array([room.dims for room in scene_graph.rooms], dtype=np.float64).reshape(-1, 3)
+        return centroids, dims, np.array(list(scene_graph.sorted_connections.keys()), dtype=np.int64).reshape(-1, 2)
+
+    with open(path, 'r') as f:
+        data = yaml.load(f, Loader=YamlLoader)
+    rooms = list(data['rooms'].values())
+    centroids = np.array([[room['centroid'][axis] for axis in 'xyz'] for room in rooms], dtype=np.float64).reshape(-1, 3)
+    dims = np.array([[room['dims'][axis] for axis in 'xyz'] for room in rooms], dtype=np.float64).reshape(-1, 3)
+    return centroids, dims, np.asarray(data['connections'] or [], dtype=np.int64).reshape(-1, 2) - 1
+
+# Compares the regenerated graph of one scene with its released graph
+# Rooms are matched by IoU, connections are compared after mapping the regenerated rooms onto their matched released rooms
+# (a connection touching an unmatched room can never be correct). Room numbers in the report are 1-based as in the YAML files
+def compare_scene(scene:str, regenerated_path:str, dataset:PackedDataset, min_iou:float=0.1):
+    centroids, dims, connections = load_regenerated(regenerated_path)
+    rooms = dataset.room_slice(scene)
+    released_centroids = dataset.centroids[rooms].astype(np.float64)
+    released_dims = dataset.dims[rooms].astype(np.float64)
+
+    iou = box_iou(centroids, dims, released_centroids, released_dims)
+    rows, cols = match_rooms(iou, min_iou)
+    centroid_drift = np.linalg.norm(centroids[rows] - released_centroids[cols], axis=1)
+    dims_drift = np.abs(dims[rows] - released_dims[cols]).max(axis=1) if len(rows) > 0 else np.zeros(0)
+
+    mapping = np.full(len(centroids), -1, dtype=np.int64)
+    mapping[rows] = cols
+    mapped = mapping[connections]
+    regenerated_edges = connection_set(connections)
+    released_edges = connection_set(dataset.scene_edges(scene))
+    correct_edges = connection_set(mapped[np.all(mapped >= 0, axis=1)]) & released_edges
+
+    return {
+        "scene": scene,
+        "released_rooms": len(released_centroids),
+        "regenerated_rooms": len(centroids),
+        "matched_rooms": len(rows),
+        "missing_rooms": sorted(int(r) + 1 for r in np.setdiff1d(np.arange(len(released_centroids)), cols)),
+        "extra_rooms": sorted(int(r) + 1 for r in np.setdiff1d(np.arange(len(centroids)), rows)),
+        "renumbered_rooms": int(np.count_nonzero(rows != cols)),
+        "mean_iou": float(iou[rows, cols].mean()) if len(rows) > 0 else 0.0,
+        "min_iou": float(iou[rows, cols].min()) if len(rows) > 0 else 0.0,
+        "max_centroid_drift": float(centroid_drift.max()) if len(rows) > 0 else 0.0,
+        "max_dims_drift": float(dims_drift.max()) if len(rows) > 0 else 0.0,
+        "mean_centroid_drift": float(centroid_drift.mean()) if len(rows) > 0 else 0.0,
+        "released_connections": len(released_edges),
+        "regenerated_connections": len(regenerated_edges),
+        "correct_connections": len(correct_edges),
+        "connection_precision": len(correct_edges) / len(regenerated_edges) if regenerated_edges else 1.0,
+        "connection_recall": len(correct_edges) / len(released_edges) if released_edges else 1.0,
+    }
+
+# Pool worker, each forked worker opens its own memory map of the packed dataset
+def compare_scene_worker(args):
+    scene, regenerated_path, dataset_path, min_iou = args
+    try:
+        return compare_scene(scene, regenerated_path, PackedDataset(dataset_path), min_iou)
+    except Exception as e:
+        return {"scene": scene, "error": repr(e)}
+
+# Regenerated scene graphs in a directory that have a released counterpart, as {scene: path} (snapshots are preferred over YAML files)
+def find_regenerated(regenerated_dir:str, dataset:PackedDataset) -> dict:
+    paths = {}
+    for file_name in sorted(os.listdir(regenerated_dir)):
+        scene, extension = os.path.splitext(file_name)
+        if scene in dataset.scene_lookup and (extension == '.npz' or (extension == '.yaml' and scene not in paths)):
+            paths[scene] = os.path.join(regenerated_dir, file_name)
+    return paths
+
+# Compares every regenerated scene in regenerated_dir with the released data, in parallel across num_workers processes
+# Returns the per-scene reports and the totals over the corpus
+def compare_release(regenerated_dir:str, dataset_path:str=PACKED_DATASET_PATH, min_iou:float=0.1, num_workers:int=None):
+    dataset = PackedDataset(dataset_path)
+    tasks = [(scene, path, dataset_path, min_iou) for scene, path in find_regenerated(regenerated_dir, dataset).items()]
+    if len(tasks) > 1:
+        with mp.get_context("fork").Pool(num_workers) as pool:
+            scenes = pool.map(compare_scene_worker, tasks)
+    else:
+        scenes = [compare_scene_worker(task) for task in tasks]
+
+    compared = [scene for scene in scenes if "error" not in scene]
+    total = lambda key: sum(scene[key] for scene in compared)
+    matched = total("matched_rooms")
+    corpus = {
+        "scenes": len(compared),
+        "failed_scenes": [scene["scene"] for scene in scenes if "error" in scene],
+        "unchecked_scenes": len(dataset.scene_names) - len(scenes),
+        "released_rooms": total("released_rooms"),
+        "regenerated_rooms": total("regenerated_rooms"),
+        "matched_rooms": matched,
+        "missing_rooms": sum(len(scene["missing_rooms"]) for scene in compared),
+        "extra_rooms": sum(len(scene["extra_rooms"]) for scene in compared),
+        "mean_iou": sum(scene["mean_iou"] * scene["matched_rooms"] for scene in compared) / matched if matched else 0.0,
+        "max_centroid_drift": max([scene["max_centroid_drift"] for scene in compared], default=0.0),
+        "max_dims_drift": max([scene["max_dims_drift"] for scene in compared], default=0.0),
+        "connection_precision": total("correct_connections") / max(total("regenerated_connections"), 1),
+        "connection_recall": total("correct_connections") / max(total("released_connections"), 1),
+    }
+    return scenes, corpus
+
+# A scene fails the check if it could not be compared, has missing or extra rooms, a room drifted by more than drift_tolerance metres
+# or its connection precision or recall is below 1 - connection_tolerance
+def scene_passes(scene, drift_tolerance:float, connection_tolerance:float) -> bool:
+    return ("error" not in scene and not scene["missing_rooms"] and not scene["extra_rooms"] and
+            scene["max_centroid_drift"] <= drift_tolerance and scene["max_dims_drift"] <= drift_tolerance and
+            scene["connection_precision"] >= 1 - connection_tolerance and scene["connection_recall"] >= 1 - connection_tolerance)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare regenerated scene graphs with the released data and exit with a non-zero status if any scene drifts')
+    parser.add_argument('--regenerated', type=str, default=SNAPSHOT_DIR, help='Directory of regenerated scene graphs, SceneGraph snapshots (.npz) or YAML files')
+    parser.add_argument('--dataset', type=str, default=PACKED_DATASET_PATH, help='Path of the packed release dataset')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (defaults to the number of CPUs)')
+    parser.add_argument('--min-iou', type=float, default=0.1, help='Minimum IoU for a regenerated room to be matched to a released room')
+    parser.add_argument('--drift-tolerance', type=float, default=0.01, help='Maximum centroid and dims drift of a matched room in metres')
+    parser.add_argument('--connection-tolerance', type=float, default=0.0, help='Maximum shortfall of connection precision and recall below 1')
+    parser.add_argument('--output', type=str, default=None, help='Path of a JSON file to write the full report to')
+    args = parser.parse_args()
+
+    scenes, corpus = compare_release(args.regenerated, args.dataset, args.min_iou, args.workers)
+    failed = [scene for scene in scenes if not scene_passes(scene, args.drift_tolerance, args.connection_tolerance)]
+    for scene in failed:
+        if "error" in scene:
+            print(f"{scene['scene']}: could not be compared: {scene['error']}")
+        else:
+            print(f"{scene['scene']}: rooms {scene['regenerated_rooms']}/{scene['released_rooms']} missing {scene['missing_rooms']} extra {scene['extra_rooms']}, "
+                  f"drift {scene['max_centroid_drift']:.3f}m / {scene['max_dims_drift']:.3f}m, mean IoU {scene['mean_iou']:.3f}, "
+                  f"connections precision {scene['connection_precision']:.2%} recall {scene['connection_recall']:.2%}")
+
+    print(f"{corpus['scenes']} scenes compared ({corpus['unchecked_scenes']} released scenes not regenerated), {len(failed)} differ: "
+          f"{corpus['matched_rooms']}/{corpus['released_rooms']} rooms matched ({corpus['missing_rooms']} missing, {corpus['extra_rooms']} extra), "
+          f"mean IoU {corpus['mean_iou']:.3f}, max drift {corpus['max_centroid_drift']:.3f}m / {corpus['max_dims_drift']:.3f}m, "
+          f"connection precision {corpus['connection_precision']:.2%} recall {corpus['connection_recall']:.2%}")
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({"corpus": corpus, "scenes": scenes}, f, indent=4)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,68 @@
+import json
+import argparse
+import numpy as np
+from PackedDataset import PackedDataset, PACKED_DATASET_PATH
+from CandidatePairs import CandidatePruning
+
+# Settings compared by default, the first only partitions the rooms into floors
+DEFAULT_SETTINGS = [
+    {},
+    {"k_nearest": 4},
+    {"k_nearest": 6},
+    {"max_gap": 1.0},
+    {"k_nearest": 4, "max_gap": 1.0},
+    {"k_nearest": 6, "max_gap": 1.0},
+    {"k_nearest": 8, "max_gap": 2.0},
+]
+
+
+# Measures how many room pairs each pruning setting removes across the released scenes and how many of the released connections
+# survive it (a pruned pair can never be connected by connect_rooms)
+def evaluate_pruning(dataset:PackedDataset, settings:list) -> list:
+    results = []
+    for setting in settings:
+        pruning = CandidatePruning(**setting)
+        total_pairs, kept_pairs, total_edges, kept_edges = 0, 0, 0, 0
+        missed = []
+        for scene in dataset.scene_names:
+            rooms = dataset.room_slice(scene)
+            candidates = pruning.candidates(dataset.centroids[rooms], dataset.dims[rooms])
+            num_rooms = len(candidates)
+            total_pairs += num_rooms * (num_rooms - 1) // 2
+            kept_pairs += int(np.triu(candidates, 1).sum())
+
+            edges = dataset.scene_edges(scene)
+            edges = edges[edges[:, 0] < edges[:, 1]]
+            kept = candidates[edges[:, 0], edges[:, 1]]
+            total_edges += len(edges)
+            kept_edges += int(kept.sum())
+            missed += [[scene, int(i) + 1, int(j) + 1] for i, j in edges[~kept]]
+
+        results.append({
+            "setting": setting,
+            "pairs": total_pairs,
+            "candidate_pairs": kept_pairs,
+            "pruning_rate": round(1 - kept_pairs / max(total_pairs, 1), 4),
+            "connections": total_edges,
+            "connections_kept": kept_edges,
+            "recall": round(kept_edges / max(total_edges, 1), 4),
+            "missed_connections": missed,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report the room pair pruning rate and connection recall of CandidatePruning settings on the released scenes')
+    parser.add_argument('--dataset', type=str, default=PACKED_DATASET_PATH, help='Path of the packed release dataset')
+    parser.add_argument('--output', type=str, default=None, help='Path of a JSON file to write the full report to')
+    args = parser.parse_args()
+
+    results = evaluate_pruning(PackedDataset(args.dataset), DEFAULT_SETTINGS)
+    for result in results:
+        # Missed connections are listed with 1-based room numbers as in the YAML files
+        print(f"{json.dumps(result['setting']):40s} pruned {result['pruning_rate']:.1%} of {result['pairs']} pairs, "
+              f"recall {result['recall']:.2%} ({result['connections_kept']}/{result['connections']}) missed: {result['missed_connections']}")
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
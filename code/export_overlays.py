@@ -0,0 +1,71 @@
+import os
+import time
+import argparse
+import traceback
+import numpy as np
+import multiprocessing as mp
+import OverlayGeometry as og
+from SceneOverlays import SceneOverlays
+from SceneGraphSnapshot import SNAPSHOT_DIR, load_snapshot
+
+OVERLAY_DIR = '../data/overlays'
+
+
+# The overlay layers of a scene graph by name, each merged into a single layer (None where the scene has nothing to draw)
+# Object boxes and the navmesh are optional, the navmesh is only exported if its islands were stored in the snapshot
+def overlay_layers(scene_graph, objects:bool=False, navmesh:bool=False) -> dict:
+    overlays = SceneOverlays(scene_graph)
+    layers = dict(zip(["room_centroids", "room_boxes", "room_box_corners"], overlays.rooms()))
+    layers["connections"] = og.merge(overlays.connected_rooms())
+    layers["paths"] = og.merge(overlays.adjacent_path_lines())
+    layers["room_nav_points"] = og.merge(overlays.room_nav_points())
+    layers["door_nav_points"] = og.merge(overlays.door_nav_points())
+    if objects:
+        layers["object_boxes"] = og.merge(overlays.object_bbs())
+    # The island vertices are the corners of the navmesh triangles, exported as the triangles themselves rather than a sphere per vertex
+    if navmesh and len(scene_graph.navmesh_islands.vertices) == len(scene_graph.navmesh_islands) and len(scene_graph.navmesh_islands) > 0:
+        islands = list(scene_graph.navmesh_islands)
+        vertices = np.concatenate(islands)
+        colours = np.repeat(np.asarray(overlays.nav_colours).reshape(-1, 3), [len(island) for island in islands], axis=0)
+        layers["navmesh"] = og.TriangleLayer(vertices, np.arange(len(vertices) - len(vertices) % 3).reshape(-1, 3), colours)
+    return layers
+
+# Pool worker, exports the overlays of one scene snapshot to a .glb file, returns (scene, seconds, error)
+def export_scene(args):
+    scene, snapshot_path, output_path, objects, navmesh = args
+    start = time.time()
+    try:
+        og.write_glb(output_path, overlay_layers(load_snapshot(snapshot_path), objects, navmesh))
+        return scene, time.time() - start, None
+    except Exception:
+        return scene, time.time() - start, traceback.format_exc()
+
+# Exports the overlays of every scene snapshot in snapshot_dir (or only the given scene names) to output_dir/<scene>.glb,
+# in parallel across num_workers processes. Nothing is drawn and no scene mesh is loaded, so this runs without a display
+def export_overlays(snapshot_dir:str=SNAPSHOT_DIR, output_dir:str=OVERLAY_DIR, scenes=None, num_workers:int=None, objects:bool=False, navmesh:bool=False):
+    if scenes is None:
+        scenes = sorted(os.path.splitext(f)[0] for f in os.listdir(snapshot_dir) if f.endswith('.npz') and not f.endswith('.tmp.npz'))
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(scene, os.path.join(snapshot_dir, scene + '.npz'), os.path.join(output_dir, scene + '.glb'), objects, navmesh) for scene in scenes]
+    if len(tasks) > 1:
+        with mp.get_context("fork").Pool(num_workers) as pool:
+            return pool.map(export_scene, tasks)
+    return [export_scene(task) for task in tasks]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the room, connection, path and door point overlays of scene graph snapshots to binary glTF files')
+    parser.add_argument('--snapshots', type=str, default=SNAPSHOT_DIR, help='Directory of scene graph snapshots (see SceneGraphSnapshot)')
+    parser.add_argument('--output', type=str, default=OVERLAY_DIR, help='Directory the <scene>.glb files are written to')
+    parser.add_argument('--scenes', type=str, nargs='*', default=None, help='Names of the scenes to export (all snapshots by default)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (defaults to the number of CPUs)')
+    parser.add_argument('--objects', action='store_true', help='Also export the object bounding boxes')
+    parser.add_argument('--navmesh', action='store_true', help='Also export the navmesh islands stored in the snapshots')
+    args = parser.parse_args()
+
+    start = time.time()
+    results = export_overlays(args.snapshots, args.output, args.scenes, args.workers, args.objects, args.navmesh)
+    for scene, _, error in results:
+        if error is not None:
+            print(f"Failed to export {scene}:\n{error}")
+    print(f"Exported {sum(error is None for _, _, error in results)}/{len(results)} scenes to {args.output} in {time.time() - start:.2f}s")
@@ -1,17 +1,37 @@
 import os
+import sys
 import argparse
+import tempfile
 import json
 import yaml
 import open3d as o3d
 import numpy as np
-from utils import create_habsim_instance, generate_hm3dsem_filepaths_json, save_scene_graph_to_yaml, convert_label_data_release_format
+from utils import create_habsim_instance, generate_hm3dsem_filepaths_json, scene_name, save_scene_graph_to_yaml, convert_label_data_release_format, scene_mesh_path
 from SceneGraph import SceneGraph
-from SceneRenderer import SceneRenderer
+from Pathfinder import HabitatPathfinder
+from PathfindingPool import PathfindingPool
+from batch import MANIFEST_PATH, parse_scene_selection, run_batch
+from Profiler import PROFILE_DIR, StageProfiler
+from session import run_labelling_session, show_scene
+from SceneGraphSnapshot import load_snapshot, save_snapshot, scene_snapshot_path
+from LabelSuggester import prefill_scene_labels
+from MeshCache import LOD_TRIANGLE_BUDGETS
 
 # Parse the index of the scene to be processed (index in HM3DSem_paths.json) & the dataset parent directory
 parser = argparse.ArgumentParser()
 parser.add_argument('--data-parent-dir', type=str, default=None, help='The absolute path to the parent directory of the scene_datasets directory')
 parser.add_argument('--scene-index', type=int, default=0, help='The index of the scene to be processed in hm3d_paths.json')
+parser.add_argument('--mesh-lod', type=int, default=None, choices=range(len(LOD_TRIANGLE_BUDGETS)), help='Draw the cached scene mesh with per-vertex colours at this level of detail (0 is full resolution) instead of the textured OBJ')
+parser.add_argument('--profile', action='store_true', help='Record per-stage timings and pathfinder call counts to ../data/profiles/<scene>.json')
+parser.add_argument('--path-workers', type=int, default=1, help='Number of worker processes used for pathfinding within the scene (each loads its own copy of the navmesh)')
+parser.add_argument('--suggest-labels', action='store_true', help='Pre-fill the room labels of new scenes with suggestions learnt from the labelled scenes in label_data')
+parser.add_argument('--store-navmesh', action='store_true', help='Extract the navmesh islands and store them in the scene graph snapshot so --render-only and export_overlays.py --navmesh can draw them')
+parser.add_argument('--render-only', action='store_true', help='Reopen the visualiser from the snapshot saved the last time the scene was built, without starting habitat-sim')
+parser.add_argument('--batch', type=str, default=None, help='Headless batch mode: the scenes to process, e.g. "all", "0-9" or "1,4,7-9"')
+parser.add_argument('--session', type=str, default=None, help='Labelling session: the scenes to label one after another, the next scene is built while the current one is labelled')
+parser.add_argument('--workers', type=int, default=1, help='Number of worker processes used in batch mode (one simulator per worker)')
+parser.add_argument('--timeout', type=float, default=None, help='Maximum number of seconds a scene may take in batch mode')
+parser.add_argument('--manifest', type=str, default=MANIFEST_PATH, help='Path of the resumable batch mode manifest')
 args = parser.parse_args()
 
 # Generate the scene file paths JSON file if it does not exist
@@ -31,50 +51,74 @@ else:
 with open('../data/HM3DSem_paths.json', 'r') as f:
     scenes = json.load(f)
 
-# Create habitat-sim instance 
 scene_config = data_parent_dir + "/scene_datasets/hm3d/hm3d_annotated_basis.scene_dataset_config.json"
+
+# Reopen the visualiser from the scene graph snapshot, habitat-sim is never imported
+if args.render_only:
+    scene_id = scenes[args.scene_index]
+    scene_graph = load_snapshot(scene_snapshot_path(scene_name(scene_id)))
+    show_scene(scene_graph, scene_mesh_path(data_parent_dir, scene_id), args.mesh_lod)
+    convert_label_data_release_format(scenes=[scene_name(scene_id) + '.yaml'])
+    sys.exit()
+
+# Build the scene graphs for a range of scenes without opening the visualiser
+if args.batch is not None:
+    scene_ids = [scenes[i] for i in parse_scene_selection(args.batch, len(scenes))]
+    run_batch(scene_config, scene_ids, args.manifest, args.workers, args.timeout, args.profile, args.store_navmesh)
+    sys.exit()
+
+# Label a range of scenes, building each scene in the background while the previous one is labelled
+if args.session is not None:
+    scene_ids = [scenes[i] for i in parse_scene_selection(args.session, len(scenes))]
+    run_labelling_session(scene_config, scene_ids, data_parent_dir, args.mesh_lod, args.suggest_labels, args.store_navmesh)
+    sys.exit()
+
+# The pathfinding workers are forked before the habitat-sim instance exists so they do not inherit the simulator or its GL context,
+# they load a copy of the simulator's navmesh saved to a temporary directory
 scene_id = scenes[args.scene_index]
-sim = create_habsim_instance(scene_config, scene_id)
+pool = None
+if args.path_workers > 1:
+    navmesh_dir = tempfile.TemporaryDirectory()
+    pool = PathfindingPool(None, args.path_workers)
+
+# Create habitat-sim instance 
+profiler = StageProfiler(enabled=args.profile)
+with profiler.stage("create_habsim_instance"):
+    sim = create_habsim_instance(scene_config, scene_id, sensors=False)
 
 # Construct the scene graph
-scene_graph = SceneGraph()
-scene_graph.construct_graph(sim)
+if pool is not None:
+    navmesh_path = os.path.join(navmesh_dir.name, scene_name(scene_id) + '.navmesh')
+    sim.pathfinder.save_nav_mesh(navmesh_path)
+    pool.set_navmesh(navmesh_path)
+scene_graph = SceneGraph(profiler)
+try:
+    scene_graph.construct_graph(sim.semantic_scene, HabitatPathfinder(sim.pathfinder), pool)
+finally:
+    if pool is not None:
+        pool.close()
+        navmesh_dir.cleanup()
+
+# The navmesh island vertices are extracted lazily, with --store-navmesh they are all extracted so the snapshot holds them
+if args.store_navmesh:
+    scene_graph.navmesh_islands.materialize()
+scene_graph.navmesh_islands.release()
 
 # Close the habitat-sim instance, otherwise Open3D visualizer will not run
 sim.close()
 
-# Save the scene graph to a YAML file
+if args.profile:
+    profiler.save(os.path.join(PROFILE_DIR, scene_name(scene_id) + '.json'), scene=scene_name(scene_id), rooms=len(scene_graph.rooms))
+
+# Save the scene graph to a YAML file, and a snapshot of it for --render-only
 data = scene_graph.to_dict()
 save_scene_graph_to_yaml(data, scene_id)
+save_snapshot(scene_graph, scene_snapshot_path(scene_name(scene_id)))
+if args.suggest_labels:
+    prefill_scene_labels([scene_name(scene_id) + '.yaml'])
+
+# Open the visualiser, the labels are filled in the YAML file while it is open
+show_scene(scene_graph, scene_mesh_path(data_parent_dir, scene_id), args.mesh_lod)
 
-# Create SceneRenderer instance
-renderer = SceneRenderer(scene_graph)
-
-# Draw mesh of scene
-obj_filename = scene_id.split('/')[-2].split('-')[1]+'.obj'
-mesh_path = os.path.join(data_parent_dir, 'scene_datasets/hm3d/obj', scene_id.split('/')[-3], scene_id.split('/')[-2], obj_filename)
-renderer.draw_scene_mesh(mesh_path)
-
-# Draw overlays
-renderer.draw_rooms()
-# renderer.draw_object_centroids()
-# renderer.draw_object_room_lines()
-# renderer.draw_object_bbs()
-# renderer.draw_adjacent_paths()
-# renderer.draw_room_nav_points()
-# renderer.draw_door_nav_points()
-# renderer.draw_connected_rooms()
-# renderer.draw_navmesh()
-# renderer.draw_object_category("door frame")
-
-# Draw room index chart
-renderer.plot_room_index_chart()
-
-# Run visualizer
-renderer.vis.run()
-
-# Destroy visualizer window
-renderer.vis.destroy_window()
-
-# Convert the labelled data to release format
-convert_label_data_release_format()   
\ No newline at end of file
+# Convert the labelled scene to release format
+convert_label_data_release_format(scenes=[scene_name(scene_id) + '.yaml'])   
\ No newline at end of file
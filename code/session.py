@@ -0,0 +1,159 @@
+import time
+import queue
+import traceback
+import multiprocessing as mp
+from utils import create_habsim_instance, save_scene_graph_to_yaml, scene_name, convert_label_data_release_format, scene_mesh_path
+from SceneGraph import SceneGraph
+from Pathfinder import HabitatPathfinder
+from MeshCache import load_scene_mesh
+from SceneGraphSnapshot import save_snapshot, scene_snapshot_path
+from LabelSuggester import prefill_scene_labels
+from SimulatorSession import SimulatorSession
+
+
+# Builds the scene graph of a scene and saves it to its label_data YAML file and its snapshot
+# Without a SimulatorSession a simulator is created for the scene and closed before returning, with one the scene is loaded into
+# the session's simulator, which stays open. The graph keeps no reference to the simulator so it can be sent back from a worker process
+# With store_navmesh the navmesh islands are extracted so the snapshot holds them
+# With suggest_labels the unlabelled rooms of the YAML file are pre-filled with label suggestions (see LabelSuggester.prefill_labels)
+def build_scene_graph(scene_config:str, scene_id:str, store_navmesh:bool=False, suggest_labels:bool=False, session:SimulatorSession=None) -> SceneGraph:
+    sim = session.load_scene(scene_id) if session is not None else create_habsim_instance(scene_config, scene_id, sensors=False)
+    try:
+        scene_graph = SceneGraph()
+        scene_graph.construct_graph(sim.semantic_scene, HabitatPathfinder(sim.pathfinder))
+        if store_navmesh:
+            scene_graph.navmesh_islands.materialize()
+        scene_graph.navmesh_islands.release()
+    finally:
+        if session is None:
+            sim.close()
+
+    save_scene_graph_to_yaml(scene_graph.to_dict(), scene_id)
+    save_snapshot(scene_graph, scene_snapshot_path(scene_name(scene_id)))
+    # Read serially as the prefetch process is a daemon and cannot start a pool
+    if suggest_labels:
+        prefill_scene_labels([scene_name(scene_id) + '.yaml'], num_workers=1)
+    return scene_graph
+
+# Opens the visualiser for a scene graph and blocks until the window is closed
+def show_scene(scene_graph:SceneGraph, mesh_path:str, mesh_lod:int=None):
+    import matplotlib.pyplot as plt
+    from SceneRenderer import SceneRenderer
+
+    # Create SceneRenderer instance
+    renderer = SceneRenderer(scene_graph)
+
+    # Draw mesh of scene
+    renderer.draw_scene_mesh(mesh_path, lod=mesh_lod, textured=mesh_lod is None)
+
+    # Draw overlays
+    renderer.draw_rooms()
+    # renderer.draw_object_centroids()
+    # renderer.draw_object_room_lines()
+    # renderer.draw_object_bbs()
+    # renderer.draw_adjacent_paths()
+    # renderer.draw_room_nav_points()
+    # renderer.draw_door_nav_points()
+    # renderer.draw_connected_rooms()
+    # renderer.draw_navmesh()                   # needs the navmesh islands, see --store-navmesh
+    # renderer.draw_object_category("door frame")
+
+    # Draw room index chart
+    renderer.plot_room_index_chart()
+
+    # Run visualizer
+    renderer.vis.run()
+
+    # Destroy visualizer window
+    renderer.vis.destroy_window()
+    plt.close('all')
+
+# Background process main loop, builds the scene graph (and the cached viewer mesh if a mesh_lod is given) of one scene at a time until it receives None
+# One simulator is kept for the whole labelling session (see SimulatorSession)
+def prefetch_loop(scene_config:str, data_parent_dir:str, mesh_lod:int, suggest_labels:bool, store_navmesh:bool, task_queue, result_queue):
+    with SimulatorSession(scene_config) as session:
+        while True:
+            scene_id = task_queue.get()
+            if scene_id is None:
+                break
+
+            start = time.time()
+            try:
+                scene_graph = build_scene_graph(scene_config, scene_id, store_navmesh, suggest_labels, session)
+                if mesh_lod is not None:
+                    load_scene_mesh(scene_mesh_path(data_parent_dir, scene_id), mesh_lod)
+                result_queue.put((scene_id, scene_graph, time.time() - start, None))
+            except Exception:
+                result_queue.put((scene_id, None, time.time() - start, traceback.format_exc()))
+
+# Background process that builds scenes ahead of the visualiser
+class PrefetchWorker:
+    def __init__(self, ctx, scene_config:str, data_parent_dir:str, mesh_lod:int, suggest_labels:bool=False, store_navmesh:bool=False):
+        self.task_queue = ctx.Queue()
+        self.result_queue = ctx.Queue()
+        self.process = ctx.Process(target=prefetch_loop, args=(scene_config, data_parent_dir, mesh_lod, suggest_labels, store_navmesh, self.task_queue, self.result_queue), daemon=True)
+        self.process.start()
+
+    def request(self, scene_id:str):
+        self.task_queue.put(scene_id)
+
+    # Waits for the next scene, returns (scene_id, scene_graph, seconds, error)
+    # Raises RuntimeError if the process dies without a result (e.g. a segfault inside habitat-sim)
+    def result(self):
+        while True:
+            try:
+                return self.result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError(f"Prefetch process exited with code {self.process.exitcode}")
+
+    def stop(self):
+        if self.process.is_alive():
+            self.task_queue.put(None)
+            self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+# Labels a list of scenes one after another
+# While the visualiser for one scene is open a background process builds the scene graph, the YAML file and the cached mesh (with a mesh_lod) of the next,
+# so the next visualiser opens as soon as the current one is closed
+# After each visualiser is closed only that scene is converted to release format (and only if its label_data file changed)
+# A crashed prefetch process is replaced by one of max_restarts spare processes, the session stops once they are used up
+def run_labelling_session(scene_config:str, scene_ids, data_parent_dir:str, mesh_lod:int=None, suggest_labels:bool=False, store_navmesh:bool=False,
+                          max_restarts:int=2):
+    # The worker and its spares are all forked here, before any simulator or visualiser exists in this process, as forking after
+    # the visualiser has created its GL context is unsafe
+    ctx = mp.get_context("fork")
+    worker = PrefetchWorker(ctx, scene_config, data_parent_dir, mesh_lod, suggest_labels, store_navmesh)
+    spares = [PrefetchWorker(ctx, scene_config, data_parent_dir, mesh_lod, suggest_labels, store_navmesh) for _ in range(max_restarts)]
+    if scene_ids:
+        worker.request(scene_ids[0])
+
+    try:
+        for n, scene_id in enumerate(scene_ids):
+            wait_start = time.time()
+            try:
+                _, scene_graph, seconds, error = worker.result()
+            except RuntimeError as e:
+                error, seconds = str(e), time.time() - wait_start
+                if not spares:
+                    raise RuntimeError(f"[{n + 1}/{len(scene_ids)}] Prefetch process crashed on {scene_name(scene_id)} and no spare process is left, "
+                                       f"stopping the session: {error}")
+                worker.stop()
+                worker = spares.pop(0)
+
+            # Start on the next scene before opening the visualiser for this one
+            if n + 1 < len(scene_ids):
+                worker.request(scene_ids[n + 1])
+
+            if error is not None:
+                print(f"[{n + 1}/{len(scene_ids)}] Failed to build {scene_name(scene_id)}, skipping it:\n{error}")
+                continue
+
+            print(f"[{n + 1}/{len(scene_ids)}] {scene_name(scene_id)}: {len(scene_graph.rooms)} rooms, built in {seconds:.1f}s, waited {time.time() - wait_start:.1f}s")
+            show_scene(scene_graph, scene_mesh_path(data_parent_dir, scene_id), mesh_lod)
+            convert_label_data_release_format(scenes=[scene_name(scene_id) + '.yaml'])
+    finally:
+        for process in [worker] + spares:
+            process.stop()
@@ -0,0 +1,22 @@
+import json
+import argparse
+from LabelSuggester import LABEL_DATA_DIR, LabelSuggester, RoomCategoryMatrix, load_label_data, prefill_scene_labels
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Suggest room labels from the object categories of the labelled scenes in label_data')
+    parser.add_argument('--label-data', type=str, default=LABEL_DATA_DIR, help='Directory of the label_data YAML files')
+    parser.add_argument('--prefill', type=str, nargs='*', default=None, help='Scene files in label_data (e.g. 00800-TEEsavR23oF.yaml) whose unlabelled rooms are pre-filled')
+    parser.add_argument('--k', type=int, default=10, help='Number of nearest labelled rooms that vote on the labels of a room')
+    parser.add_argument('--top', type=int, default=3, help='Number of ranked suggestions')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes used to read the YAML files')
+    args = parser.parse_args()
+
+    if args.prefill:
+        for scene, prefilled in prefill_scene_labels(args.prefill, args.label_data, args.k, args.top).items():
+            print(f"{scene}: pre-filled {prefilled} room labels")
+    else:
+        # Leave-one-scene-out accuracy of the suggestions on the labelled rooms
+        features = RoomCategoryMatrix.from_scenes(load_label_data(args.label_data, num_workers=args.workers))
+        print(f"{len(features)} rooms, {len(features.categories)} object categories, {features.counts.nnz} non-zero counts")
+        print(json.dumps(LabelSuggester(args.k).fit(features).evaluate(features, args.top), indent=4))
@@ -0,0 +1,48 @@
+import numpy as np
+from SyntheticScene import generate_synthetic_scene
+from SceneGraph import SceneGraph
+from GraphParameters import GraphParameters
+
+
+# Synthetic scene whose second room (region 2) only has two objects, which are both outliers of each other below one standard deviation
+def scene_with_two_object_room():
+    semantic_scene, pathfinder = generate_synthetic_scene(num_rooms=4, objects_per_room=10)
+    semantic_scene.regions[2].objects = semantic_scene.regions[2].objects[:2]
+    return semantic_scene, pathfinder
+
+def assert_rooms_hold_their_objects(scene_graph):
+    assert len(scene_graph.room_regions) == len(scene_graph.rooms)
+    assert np.array_equal(np.unique(scene_graph.objects.room_ids), np.arange(len(scene_graph.rooms)))
+    for i, room in enumerate(scene_graph.rooms):
+        assert room.table is scene_graph.objects
+        assert room.object_slice.stop > room.object_slice.start
+        assert np.all(scene_graph.objects.room_ids[room.object_slice] == i)
+        assert np.count_nonzero(scene_graph.objects.room_ids == i) == room.object_slice.stop - room.object_slice.start
+        centroids = scene_graph.objects.centroids[room.object_slice]
+        assert np.allclose(room.centroid, (centroids.min(axis=0) + centroids.max(axis=0)) / 2)
+
+def test_low_outlier_std_drops_emptied_room():
+    semantic_scene, pathfinder = scene_with_two_object_room()
+    default_graph = SceneGraph()
+    default_graph.construct_graph(semantic_scene, pathfinder)
+    assert 2 in default_graph.room_regions
+
+    scene_graph = SceneGraph(parameters=GraphParameters(outlier_std=0.9))
+    scene_graph.construct_graph(semantic_scene, pathfinder)
+    assert 2 not in scene_graph.room_regions
+    assert len(scene_graph.rooms) == len(default_graph.rooms) - 1
+    assert_rooms_hold_their_objects(scene_graph)
+    assert all(i < len(scene_graph.rooms) and j < len(scene_graph.rooms) for i, j in scene_graph.connections)
+
+def test_update_to_low_outlier_std_matches_fresh_build():
+    semantic_scene, pathfinder = scene_with_two_object_room()
+    parameters = GraphParameters(outlier_std=0.9)
+    updated_graph = SceneGraph(keep_pathfinder_cache=True)
+    updated_graph.construct_graph(semantic_scene, pathfinder)
+    updated_graph.update_parameters(parameters, pathfinder)
+    fresh_graph = SceneGraph(parameters=parameters)
+    fresh_graph.construct_graph(semantic_scene, pathfinder)
+
+    assert_rooms_hold_their_objects(updated_graph)
+    assert np.array_equal(updated_graph.room_regions, fresh_graph.room_regions)
+    assert updated_graph.to_dict() == fresh_graph.to_dict()
@@ -1,60 +1,125 @@
 import os
 import json
 import yaml
+import hashlib
+import multiprocessing as mp
 import numpy as np
-import habitat_sim
+from PackedDataset import PACKED_DATASET_PATH, YamlLoader, file_hash, write_packed_dataset, verify_packed_dataset, stale_release_files
+
+# Use the libyaml C implementation when PyYAML was built with it (see PackedDataset.YamlLoader for the loader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Content hashes of the label_data files used for the current release files, kept outside release_data so it is not published
+SOURCE_HASHES_PATH = '../data/.release_hashes.json'
+
+# Name of a scene (e.g. 00800-TEEsavR23oF) from its path in HM3DSem_paths.json
+def scene_name(scene_id:str) -> str:
+    return scene_id.split('/')[-2]
+
+# Creates a habitat-sim instance for the given scene
+# Graph construction only needs the semantic scene and the pathfinder so the camera sensors can be skipped with sensors=False
+# The navmesh is loaded from a cache next to the scene when one exists for the same settings (see load_or_recompute_navmesh)
+# To build several scenes in one process use a SimulatorSession, which reconfigures one simulator rather than creating one per scene
+def create_habsim_instance(scene_config:str, scene_id:str, sensors:bool=True, use_navmesh_cache:bool=True) -> "habitat_sim.Simulator":
+    import habitat_sim
+
+    cfg = habitat_sim.Configuration(habsim_simulator_configuration(scene_config, scene_id), [habsim_agent_configuration(sensors)])
+    sim = habitat_sim.Simulator(cfg)
+    load_scene_navmesh(sim, scene_id, use_navmesh_cache)
+    return sim
+
+# Simulator configuration of the given scene
+def habsim_simulator_configuration(scene_config:str, scene_id:str) -> "habitat_sim.SimulatorConfiguration":
+    import habitat_sim
+
+    sim_cfg = habitat_sim.SimulatorConfiguration()
+    sim_cfg.gpu_device_id = 0
+    sim_cfg.scene_dataset_config_file = scene_config
+    sim_cfg.scene_id = scene_id
+    return sim_cfg
+
+# Agent configuration with colour, depth and semantic camera sensors, or no sensors with sensors=False
+def habsim_agent_configuration(sensors:bool=True) -> "habitat_sim.agent.AgentConfiguration":
+    import habitat_sim
 
-def create_habsim_instance(scene_config:str, scene_id:str) -> habitat_sim.Simulator:
     settings = {
         "width": 256,                               # Resolution of the observations
         "height": 256,
         "sensor_height": 0,                         # Height of sensors from agent base in meters
-        "scene_dataset_config_file": scene_config,
     }
 
-    sim_cfg = habitat_sim.SimulatorConfiguration()
-    sim_cfg.gpu_device_id = 0
-    sim_cfg.scene_dataset_config_file = settings['scene_dataset_config_file']
-    sim_cfg.scene_id = scene_id
-
     sensor_specs = []
 
-    color_sensor_spec = habitat_sim.CameraSensorSpec()
-    color_sensor_spec.uuid = "color_sensor"
-    color_sensor_spec.sensor_type = habitat_sim.SensorType.COLOR
-    color_sensor_spec.resolution = [settings["height"], settings["width"]]
-    color_sensor_spec.position = np.array([0.0, settings["sensor_height"], 0.0], dtype=np.float32)
-    color_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(color_sensor_spec)
-
-    depth_sensor_spec = habitat_sim.CameraSensorSpec()
-    depth_sensor_spec.uuid = "depth_sensor"
-    depth_sensor_spec.sensor_type = habitat_sim.SensorType.DEPTH
-    depth_sensor_spec.resolution = [settings["height"], settings["width"]]
-    depth_sensor_spec.position = np.array([0.0, settings["sensor_height"], 0.0],dtype=np.float32)
-    depth_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(depth_sensor_spec)
-
-    semantic_sensor_spec = habitat_sim.CameraSensorSpec()
-    semantic_sensor_spec.uuid = "semantic_sensor"
-    semantic_sensor_spec.sensor_type = habitat_sim.SensorType.SEMANTIC
-    semantic_sensor_spec.resolution = [settings["height"], settings["width"]]
-    semantic_sensor_spec.position = np.array([0.0, settings["sensor_height"], 0.0], dtype=np.float32)
-    semantic_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
-    sensor_specs.append(semantic_sensor_spec)
+    if sensors:
+        color_sensor_spec = habitat_sim.CameraSensorSpec()
+        color_sensor_spec.uuid = "color_sensor"
+        color_sensor_spec.sensor_type = habitat_sim.SensorType.COLOR
+        color_sensor_spec.resolution = [settings["height"], settings["width"]]
+        color_sensor_spec.position = np.array([0.0, settings["sensor_height"], 0.0], dtype=np.float32)
+        color_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
+        sensor_specs.append(color_sensor_spec)
+
+        depth_sensor_spec = habitat_sim.CameraSensorSpec()
+        depth_sensor_spec.uuid = "depth_sensor"
+        depth_sensor_spec.sensor_type = habitat_sim.SensorType.DEPTH
+        depth_sensor_spec.resolution = [settings["height"], settings["width"]]
+        depth_sensor_spec.position = np.array([0.0, settings["sensor_height"], 0.0],dtype=np.float32)
+        depth_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
+        sensor_specs.append(depth_sensor_spec)
+
+        semantic_sensor_spec = habitat_sim.CameraSensorSpec()
+        semantic_sensor_spec.uuid = "semantic_sensor"
+        semantic_sensor_spec.sensor_type = habitat_sim.SensorType.SEMANTIC
+        semantic_sensor_spec.resolution = [settings["height"], settings["width"]]
+        semantic_sensor_spec.position = np.array([0.0, settings["sensor_height"], 0.0], dtype=np.float32)
+        semantic_sensor_spec.sensor_subtype = habitat_sim.SensorSubType.PINHOLE
+        sensor_specs.append(semantic_sensor_spec)
 
     agent_cfg = habitat_sim.agent.AgentConfiguration()
     agent_cfg.sensor_specifications = sensor_specs
+    return agent_cfg
 
-    cfg = habitat_sim.Configuration(sim_cfg, [agent_cfg])
-    sim = habitat_sim.Simulator(cfg)
+# Loads (or recomputes) the navmesh of the scene the simulator currently holds
+def load_scene_navmesh(sim, scene_id:str, use_navmesh_cache:bool=True):
+    import habitat_sim
 
     navmesh_settings = habitat_sim.NavMeshSettings()
     navmesh_settings.set_defaults()
     navmesh_settings.agent_height = 0.75
-    sim.recompute_navmesh(sim.pathfinder, navmesh_settings)
+    if use_navmesh_cache:
+        load_or_recompute_navmesh(sim, scene_id, navmesh_settings)
+    else:
+        sim.recompute_navmesh(sim.pathfinder, navmesh_settings)
 
-    return sim
+# Returns a short hash of all the values of a habitat_sim.NavMeshSettings object
+def navmesh_settings_hash(navmesh_settings) -> str:
+    values = {}
+    for name in dir(navmesh_settings):
+        if not name.startswith('_'):
+            value = getattr(navmesh_settings, name)
+            if not callable(value):
+                values[name] = value
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+# The cached navmesh is stored next to the scene and keyed by the scene name and the navmesh settings
+def navmesh_cache_path(scene_id:str, navmesh_settings) -> str:
+    return os.path.join(os.path.dirname(scene_id), scene_name(scene_id) + '.' + navmesh_settings_hash(navmesh_settings) + '.navmesh')
+
+# Loads the navmesh for the scene from the cache, or recomputes it and writes it to the cache
+# A cached navmesh is ignored if it is older than the scene file or fails to load
+# Returns True if the navmesh was loaded from the cache
+def load_or_recompute_navmesh(sim, scene_id:str, navmesh_settings) -> bool:
+    cache_path = navmesh_cache_path(scene_id, navmesh_settings)
+
+    if os.path.exists(cache_path):
+        stale = os.path.exists(scene_id) and os.path.getmtime(cache_path) < os.path.getmtime(scene_id)
+        if not stale and sim.pathfinder.load_nav_mesh(cache_path):
+            return True
+
+    sim.recompute_navmesh(sim.pathfinder, navmesh_settings)
+    if not sim.pathfinder.save_nav_mesh(cache_path):
+        print("Could not write navmesh cache " + cache_path)
+    return False
 
 def generate_hm3dsem_filepaths_json(data_parent_dir:str):
     scene_dataset_config_path = os.path.join(data_parent_dir, "scene_datasets/hm3d/hm3d_annotated_basis.scene_dataset_config.json")
@@ -76,13 +141,18 @@ def generate_hm3dsem_filepaths_json(data_parent_dir:str):
     with open('../data/HM3DSem_paths.json', 'w') as f:
         json.dump(new_paths, f, indent=4)
 
+# Path of the textured OBJ mesh of a scene drawn by the visualiser
+def scene_mesh_path(data_parent_dir:str, scene_id:str) -> str:
+    obj_filename = scene_name(scene_id).split('-')[1]+'.obj'
+    return os.path.join(data_parent_dir, 'scene_datasets/hm3d/obj', scene_id.split('/')[-3], scene_name(scene_id), obj_filename)
+
 def save_scene_graph_to_yaml(data, scene_id):
     target_dir = '../data/label_data'
 
     if not os.path.exists(target_dir):
         os.makedirs(target_dir)
 
-    file_name = scene_id.split('/')[-2]+'.yaml'
+    file_name = scene_name(scene_id)+'.yaml'
     file_path = os.path.join(target_dir, file_name)
     print(file_path)
 
@@ -92,30 +162,95 @@ def save_scene_graph_to_yaml(data, scene_id):
     else:
         print("File already exists")
 
-def convert_label_data_release_format():
+# Strips the object lists from a labelled scene graph file and writes it in release format
+def convert_scene_release_format(source_path:str, target_path:str):
+    with open(source_path, 'r') as f:
+        data = yaml.load(f, Loader=YamlLoader)
+
+    out = {}
+    out['rooms'] = {}
+    
+    for room_key, room in data['rooms'].items():
+        out['rooms'][room_key] = {}
+        out['rooms'][room_key]['label'] = room['label']
+        out['rooms'][room_key]['centroid'] = room['centroid']
+        out['rooms'][room_key]['dims'] = room['dims']
+
+    out['connections'] = data['connections']
+
+    with open(target_path, 'w') as f:
+        yaml.dump(out, f, Dumper=YamlDumper, sort_keys=False, default_flow_style=False)
+
+# Converts a single scene for the worker pool, returning (scene, error) where error is None on success
+def convert_scene_worker(args):
+    scene, source_path, target_path = args
+    try:
+        convert_scene_release_format(source_path, target_path)
+        return scene, None
+    except Exception as e:
+        return scene, repr(e)
+
+# Converts the labelled scene graphs in label_data to release format
+# Scenes are only rebuilt when the content hash of their label_data file has changed since the last conversion (or the output is missing)
+# Pass a list of scene file names to restrict the conversion to those scenes
+def convert_label_data_release_format(scenes=None, num_workers:int=None):
     source_dir = '../data/label_data'
     target_dir = '../data/release_data'
+    hashes_path = SOURCE_HASHES_PATH
 
     if not os.path.exists(target_dir):
         os.makedirs(target_dir)
 
-    scenes = sorted(os.listdir(source_dir))
+    if scenes is None:
+        scenes = sorted(f for f in os.listdir(source_dir) if f.endswith('.yaml'))
+
+    previous_hashes = {}
+    if os.path.exists(hashes_path):
+        with open(hashes_path, 'r') as f:
+            previous_hashes = json.load(f)
 
+    # Scenes that have no label_data file (e.g. opened with --render-only before they were ever labelled) have nothing to convert
+    missing = [scene for scene in scenes if not os.path.exists(os.path.join(source_dir, scene))]
+    for scene in missing:
+        print("No label_data file for " + scene + ", not converting it")
+    scenes = [scene for scene in scenes if scene not in missing]
+
+    hashes = dict(previous_hashes)
+    tasks = []
     for scene in scenes:
-        if not os.path.exists(os.path.join(target_dir, scene)):
-            with open(os.path.join(source_dir, scene), 'r') as f:
-                data = yaml.load(f, Loader=yaml.FullLoader)
-
-                out = {}
-                out['rooms'] = {}
-                
-                for room_key, room in data['rooms'].items():
-                    out['rooms'][room_key] = {}
-                    out['rooms'][room_key]['label'] = room['label']
-                    out['rooms'][room_key]['centroid'] = room['centroid']
-                    out['rooms'][room_key]['dims'] = room['dims']
-
-                out['connections'] = data['connections']
-
-            with open(os.path.join(target_dir, scene), 'w') as f:
-                yaml.dump(out, f, sort_keys=False, default_flow_style=False)
+        hashes[scene] = file_hash(os.path.join(source_dir, scene))
+        if hashes[scene] != previous_hashes.get(scene) or not os.path.exists(os.path.join(target_dir, scene)):
+            tasks.append((scene, os.path.join(source_dir, scene), os.path.join(target_dir, scene)))
+
+    # Forked workers avoid re-executing main.py, a single changed scene is converted in-process
+    if len(tasks) > 1:
+        with mp.get_context("fork").Pool(num_workers) as pool:
+            results = pool.map(convert_scene_worker, tasks)
+    else:
+        results = [convert_scene_worker(task) for task in tasks]
+
+    rebuilt, failed = [], []
+    for scene, error in results:
+        if error is None:
+            rebuilt.append(scene)
+        else:
+            failed.append(scene)
+            hashes.pop(scene)
+            print("Failed to convert " + scene + ": " + error)
+
+    with open(hashes_path, 'w') as f:
+        json.dump(hashes, f, indent=4, sort_keys=True)
+
+    print(f"Release conversion: {len(rebuilt)} rebuilt, {len(scenes) - len(tasks)} skipped, {len(failed)} failed")
+
+    # Pack the whole release into a single memory-mappable file alongside the YAML files
+    if rebuilt or stale_release_files(target_dir, PACKED_DATASET_PATH):
+        write_packed_dataset(target_dir, PACKED_DATASET_PATH)
+        errors = verify_packed_dataset(target_dir, PACKED_DATASET_PATH, rebuilt)
+        for error in errors:
+            print("Packed dataset mismatch: " + error)
+
+# Saves the triangle vertices of the navmesh so it can be loaded without habitat-sim by GridPathfinder.load
+def save_navmesh_vertices(pathfinder, path:str):
+    vertices = np.asarray(pathfinder.build_navmesh_vertices(-1), dtype=np.float32).reshape(-1, 3)
+    np.save(path, vertices)